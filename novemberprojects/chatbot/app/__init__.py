@@ -14,12 +14,42 @@ def create_app():
     app.config.from_object(Config)
 
     # Initialize extensions
+    from app.database import configure_engine_options, init_sqlite_pragmas
+    configure_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        init_sqlite_pragmas(app, db.engine)
     login.init_app(app)
     csrf.init_app(app)
 
+    # Request metrics and profiling
+    from app.metrics import instrumentation
+    instrumentation.init_app(app)
+
+    # Fingerprinted static URLs
+    from app.http_cache import static_assets
+    static_assets.init_app(app)
+
+    # Shared OpenAI client
+    from app.llm import llm_client
+    llm_client.init_app(app)
+
+    # Background import workers
+    from app.jobs import import_queue
+    import_queue.init_app(app)
+
     # Register Blueprints
     from app.routes import main_bp
     app.register_blueprint(main_bp)
 
+    # CLI commands
+    from app.migrations import schema_cli
+    from app.rollups import rollups_cli
+    from app.balances import balances_cli
+    from app.plans import recompute_plans_command
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(balances_cli)
+    app.cli.add_command(recompute_plans_command)
+
     return app
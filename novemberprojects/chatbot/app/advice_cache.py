@@ -0,0 +1,100 @@
+# app/advice_cache.py
+
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select
+from . import db
+from .models import AdviceCacheEntry
+
+class AdviceCache:
+    """SQLite-backed cache of generated advice with TTL and least-recently-used eviction."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(account_id, fingerprint, model, prompt_version):
+        raw = f"{account_id}|{fingerprint}|{model}|{prompt_version}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Returns cached advice for ``key``, or None if it is missing or expired."""
+        entry = db.session.get(AdviceCacheEntry, key)
+        now = datetime.utcnow()
+        if entry is not None and entry.created_at + timedelta(seconds=current_app.config['ADVICE_CACHE_TTL']) < now:
+            db.session.delete(entry)
+            db.session.commit()
+            entry = None
+        if entry is None:
+            self._count(hit=False)
+            return None
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = now
+        db.session.commit()
+        self._count(hit=True)
+        return entry.advice
+
+    def set(self, key, account_id, advice):
+        now = datetime.utcnow()
+        db.session.merge(AdviceCacheEntry(
+            key=key, account_id=account_id, advice=advice, hits=0, created_at=now, last_used_at=now,
+        ))
+        db.session.flush()
+        self._evict(now)
+        db.session.commit()
+
+    def _evict(self, now):
+        config = current_app.config
+        expired_before = now - timedelta(seconds=config['ADVICE_CACHE_TTL'])
+        db.session.execute(delete(AdviceCacheEntry).where(AdviceCacheEntry.created_at < expired_before))
+        keep = (
+            select(AdviceCacheEntry.key)
+            .order_by(AdviceCacheEntry.last_used_at.desc())
+            .limit(config['ADVICE_CACHE_MAX_ENTRIES'])
+        )
+        db.session.execute(delete(AdviceCacheEntry).where(AdviceCacheEntry.key.not_in(keep)))
+
+    def stats(self):
+        entries, stored_hits = db.session.query(
+            func.count(AdviceCacheEntry.key),
+            func.coalesce(func.sum(AdviceCacheEntry.hits), 0),
+        ).one()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'stored_hits': int(stored_hits),
+        }
+
+advice_cache = AdviceCache()
+
+def cached_advice(account_id, fingerprint, model, prompt_version, generate):
+    """Returns advice from the cache, or calls ``generate()`` and caches its result.
+
+    ``generate`` returns ``(advice, ok)``; failed responses are not cached.
+    """
+    key = AdviceCache.make_key(account_id, fingerprint, model, prompt_version)
+    advice = advice_cache.get(key)
+    if advice is not None:
+        logging.info(f"Advice cache hit for account {account_id}")
+        return advice
+    advice, ok = generate()
+    if ok:
+        advice_cache.set(key, account_id, advice)
+    return advice
@@ -3,90 +3,96 @@
 import warnings
 warnings.filterwarnings('ignore')
 import openai
-import os
+import time
 from flask import current_app
 import logging
 from flask_login import current_user
-from .models import Transaction
+from .summaries import summarize_transactions
+from .rollups import transaction_fingerprint
+from .advice_cache import cached_advice
+from .llm import llm_client
 
-def get_financial_advice(transactions):
-    openai_api_key = os.environ.get('OPENAI_API_KEY')
-    if openai_api_key:
-        openai.api_key = openai_api_key
-    else:
-        raise EnvironmentError("OpenAI API key not found. Set the OPENAI_API_KEY environment variable.")
+ADVICE_MODEL = 'gpt-3.5-turbo'
+# Bump when the advice prompt changes so cached advice is regenerated.
+ADVICE_PROMPT_VERSION = 1
 
-    transaction_list = [
-        f"{t.date.date()} - {t.category} - ${t.amount} - {t.description}"
-        for t in transactions
-    ]
-    transaction_text = "\n".join(transaction_list)
+def get_financial_advice(account):
+    """Returns advice for the account, reusing cached advice while its transactions are unchanged."""
+    prompt_version = f"{ADVICE_PROMPT_VERSION}:{current_app.config['PROMPT_TOKEN_BUDGET']}"
+    return cached_advice(
+        account.id,
+        transaction_fingerprint(account.id),
+        ADVICE_MODEL,
+        prompt_version,
+        lambda: _generate_financial_advice(account),
+    )
+
+def _generate_financial_advice(account):
+    """Calls OpenAI for advice and returns (advice, ok)."""
+    transaction_text = summarize_transactions(account.id)
 
     prompt = f"""
-    You are a financial advisor AI assistant. Based on the following transaction history, provide personalized advice on savings plans, debt repayment strategies, and highlight areas where the user can reduce spending.
+    You are a financial advisor AI assistant. Based on the following summary of the user's transaction history, provide personalized advice on savings plans, debt repayment strategies, and highlight areas where the user can reduce spending.
 
-    Transactions:
+    Transaction summary:
     {transaction_text}
     """
 
     try:
-        response = openai.ChatCompletion.create(
-            model='gpt-3.5-turbo',
-            messages=[
-                {"role": "user", "content": prompt},
-            ],
+        advice = llm_client.chat(
+            [{"role": "user", "content": prompt}],
+            model=ADVICE_MODEL,
             max_tokens=500,
             temperature=0.7,
         )
-        advice = response['choices'][0]['message']['content'].strip()
-        return advice
+        return advice, True
     except openai.OpenAIError as e:
         logging.error(f"OpenAI API error: {e}")
-        return "An error occurred while fetching financial advice. Please try again later."
+        return "An error occurred while fetching financial advice. Please try again later.", False
+
+CHAT_MODEL = 'gpt-4'  # Use 'gpt-4' if available
+CHAT_ERROR_MESSAGE = "Sorry, I'm unable to process your request at the moment. Please try again later."
+
+def build_chat_messages(conversation_history):
+    """Prepends the planner system prompt, with the user's transaction summary, to the conversation."""
+    # Summarize the user's transactions within the prompt token budget
+    account = current_user.account
+    transaction_text = summarize_transactions(account.id)
+
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a highly knowledgeable Certified Financial Planner (CFP) with expertise in personal finance, "
+                "investment strategies, and financial planning. Provide clear, accurate, and personalized advice to help users "
+                "achieve their financial goals. Consider the user's transaction history when providing advice.\n\n"
+                f"Transaction History Summary:\n{transaction_text}"
+            )
+        }
+    ] + conversation_history
 
 def get_financial_advice_chat(conversation_history):
     """Generates a response from the financial planner chatbot."""
     try:
-        # Retrieve OpenAI API key
-        openai_api_key = os.environ.get('OPENAI_API_KEY')
-        if openai_api_key:
-            openai.api_key = openai_api_key
-        else:
-            raise EnvironmentError("OpenAI API key not found. Set the OPENAI_API_KEY environment variable.")
-
-        # Fetch user's transactions
-        account = current_user.account
-        transactions = Transaction.query.filter_by(account_id=account.id).all()
-        transaction_list = [
-            f"{t.date.date()} - {t.category} - ${t.amount} - {t.description}"
-            for t in transactions
-        ]
-        transaction_text = "\n".join(transaction_list)
-
-        # Build the messages list, starting with a system message
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a highly knowledgeable Certified Financial Planner (CFP) with expertise in personal finance, "
-                    "investment strategies, and financial planning. Provide clear, accurate, and personalized advice to help users "
-                    "achieve their financial goals. Consider the user's transaction history when providing advice.\n\n"
-                    f"Transaction History:\n{transaction_text}"
-                )
-            }
-        ] + conversation_history
+        messages = build_chat_messages(conversation_history)
 
         # Call the OpenAI API
-        response = openai.ChatCompletion.create(
-            model='gpt-4',  # Use 'gpt-4' if available
-            messages=messages,
-            max_tokens=500,
-            temperature=0.7,
-        )
-
-        advice = response['choices'][0]['message']['content'].strip()
-        return advice
+        return llm_client.chat(messages, model=CHAT_MODEL, max_tokens=500, temperature=0.7)
 
     except openai.OpenAIError as e:
         logging.error(f"OpenAI API error: {e}")
-        return "Sorry, I'm unable to process your request at the moment. Please try again later."
+        return CHAT_ERROR_MESSAGE
+
+def stream_financial_advice_chat(messages):
+    """Yields the chatbot's reply piece by piece as OpenAI streams it back.
+
+    ``messages`` comes from build_chat_messages. Raises openai.OpenAIError if
+    the request fails, including part way through the stream.
+    """
+    started = time.perf_counter()
+    first_token = True
+    for delta in llm_client.stream_chat(messages, model=CHAT_MODEL, max_tokens=500, temperature=0.7):
+        if first_token:
+            logging.info(f"Chatbot time to first token: {time.perf_counter() - started:.3f}s")
+            first_token = False
+        yield delta
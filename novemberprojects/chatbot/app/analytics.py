@@ -0,0 +1,159 @@
+# app/analytics.py
+
+from datetime import date
+import numpy as np
+import pandas as pd
+from flask import current_app
+from .models import SavingsPlan
+from .plans import project_completion
+from .rollups import transaction_fingerprint
+from .summaries import load_transactions_frame
+from .caching import FingerprintCache
+
+# Negative amounts are spending, positive amounts are income.
+DAYS_PER_MONTH = 30.44
+RECURRING_PERIODS = (
+    ('weekly', 6, 8),
+    ('monthly', 26, 35),
+    ('yearly', 350, 380),
+)
+
+_cache = FingerprintCache()
+
+def monthly_flows(df, window=3):
+    """Returns income, spending, net flow and the rolling burn rate for every month."""
+    amounts = df['amount'].to_numpy()
+    flows = pd.DataFrame({
+        'month': df['date'].dt.to_period('M'),
+        'spending': np.where(amounts < 0, -amounts, 0.0),
+        'income': np.where(amounts > 0, amounts, 0.0),
+    }).groupby('month').sum()
+    # Months without transactions still count towards the rolling window.
+    flows = flows.reindex(pd.period_range(flows.index.min(), flows.index.max(), freq='M'), fill_value=0.0)
+    flows['net'] = flows['income'] - flows['spending']
+    flows['burn_rate'] = flows['spending'].rolling(window, min_periods=1).mean()
+    return flows
+
+def category_trends(df, months=6):
+    """Fits a least-squares line to each category's monthly spending over the last ``months`` months.
+
+    All categories are fitted at once as one matrix operation. The slope is in
+    dollars per month.
+    """
+    spending = df[df['amount'] < 0]
+    if spending.empty:
+        return pd.DataFrame(columns=['average', 'latest', 'slope'])
+    month = spending['date'].dt.to_period('M')
+    last = month.max()
+    recent = spending[month > last - months]
+    pivot = recent.pivot_table(
+        index='category', columns=month[month > last - months].rename('month'),
+        values='amount', aggfunc='sum', fill_value=0.0,
+    )
+    pivot = -pivot.reindex(columns=pd.period_range(last - months + 1, last, freq='M'), fill_value=0.0)
+
+    y = pivot.to_numpy()
+    x = np.arange(y.shape[1], dtype='float64')
+    x_centered = x - x.mean()
+    slope = (y - y.mean(axis=1, keepdims=True)) @ x_centered / (x_centered ** 2).sum()
+    trends = pd.DataFrame({
+        'average': y.mean(axis=1),
+        'latest': y[:, -1],
+        'slope': slope,
+    }, index=pivot.index)
+    return trends.sort_values('average', ascending=False)
+
+def recurring_charges(df, min_occurrences=3):
+    """Finds charges that repeat with the same description and amount at a regular interval."""
+    spending = df[df['amount'] < 0]
+    if spending.empty:
+        return pd.DataFrame(columns=['description', 'amount', 'period', 'count', 'last', 'next_expected'])
+    # Normalize each distinct description once, then group on integer codes.
+    codes, uniques = pd.factorize(spending['description'])
+    merchant_codes, _ = pd.factorize(pd.Index(uniques).str.strip().str.lower())
+    charges = spending.assign(
+        merchant=merchant_codes[codes],
+        rounded=spending['amount'].round(0),
+    ).sort_values(['merchant', 'rounded', 'date'])
+    keys = ['merchant', 'rounded']
+    charges['gap'] = charges.groupby(keys)['date'].diff().dt.days
+
+    stats = charges.groupby(keys).agg(
+        description=('description', 'last'),
+        amount=('amount', 'mean'),
+        count=('date', 'size'),
+        last=('date', 'max'),
+        median_gap=('gap', 'median'),
+        gap_std=('gap', 'std'),
+    )
+    stats = stats[(stats['count'] >= min_occurrences) & (stats['gap_std'].fillna(0) <= 0.2 * stats['median_gap'] + 2)]
+
+    gap = stats['median_gap'].to_numpy()
+    stats['period'] = np.select(
+        [(gap >= low) & (gap <= high) for _, low, high in RECURRING_PERIODS],
+        [name for name, _, _ in RECURRING_PERIODS],
+        default='',
+    )
+    stats = stats[stats['period'] != '']
+    stats['next_expected'] = stats['last'] + pd.to_timedelta(stats['median_gap'], unit='D')
+    return stats.reset_index(drop=True)[
+        ['description', 'amount', 'period', 'count', 'last', 'next_expected']
+    ].sort_values('amount')
+
+def savings_projections(plans, today=None):
+    """Returns each savings plan's projected completion date and the monthly amount still needed.
+
+    The projected date is the one stored on the plan by imports (see
+    plans.project_completion), so every page shows the same date. Plans no
+    import has touched yet are projected the same way on the fly.
+    """
+    today = today or date.today()
+    projections = []
+    for plan in plans:
+        goal = float(plan.goal_amount or 0)
+        current = float(plan.current_amount or 0)
+        remaining = max(goal - current, 0.0)
+        projected = plan.projected_date
+        if projected is None:
+            projected = project_completion(plan.goal_amount, plan.current_amount, plan.starting_amount,
+                                           plan.start_date, today=today)
+        required = None
+        if plan.target_date and plan.target_date > today:
+            months_left = (plan.target_date - today).days / DAYS_PER_MONTH
+            required = remaining / months_left
+        projections.append({
+            'plan': plan,
+            'remaining': remaining,
+            'reached': remaining == 0,
+            'projected_date': projected,
+            'required_monthly': required,
+            'on_track': projected is not None and (plan.target_date is None or projected <= plan.target_date),
+        })
+    return projections
+
+def account_analytics(account_id):
+    """Returns burn rate, category trends and recurring charges for an account.
+
+    Everything is computed from one columnar load of the account's transactions
+    and cached until new transactions arrive. Savings projections are not
+    cached, since plans can change without new transactions.
+    """
+    config = current_app.config
+    _cache.max_entries = config['ANALYTICS_CACHE_SIZE']
+    key = (account_id, transaction_fingerprint(account_id))
+    results = _cache.get(key)
+    if results is None:
+        df = load_transactions_frame(account_id)
+        if df.empty:
+            results = {'flows': pd.DataFrame(columns=['spending', 'income', 'net', 'burn_rate']),
+                       'trends': category_trends(df), 'recurring': recurring_charges(df)}
+        else:
+            results = {
+                'flows': monthly_flows(df, window=config['ANALYTICS_WINDOW_MONTHS']),
+                'trends': category_trends(df, months=config['SUMMARY_MONTHS']),
+                'recurring': recurring_charges(df),
+            }
+        _cache.set(key, results)
+
+    plans = SavingsPlan.query.filter_by(account_id=account_id).all()
+    return dict(results, savings=savings_projections(plans))
@@ -0,0 +1,165 @@
+# app/balances.py
+
+from collections import defaultdict
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, select, update
+from . import db
+from .database import upsert_insert
+from .models import Account, DailyBalance, Transaction
+from .signals import transactions_inserted
+
+balances_cli = AppGroup('balances', help='Maintain account balances and the daily balance table.')
+
+def _day(column):
+    # date() works on both SQLite and PostgreSQL.
+    return func.date(column)
+
+def _update_running_balances(account_id, since):
+    """Recomputes the closing balance of every day from ``since`` onwards from the daily nets."""
+    base = db.session.scalar(
+        select(DailyBalance.balance)
+        .where(DailyBalance.account_id == account_id, DailyBalance.day < since)
+        .order_by(DailyBalance.day.desc())
+        .limit(1)
+    ) or 0
+    running = select(
+        DailyBalance.id,
+        (func.sum(DailyBalance.net).over(order_by=DailyBalance.day) + base).label('balance'),
+    ).where(DailyBalance.account_id == account_id, DailyBalance.day >= since).subquery()
+    db.session.execute(
+        update(DailyBalance).where(DailyBalance.id == running.c.id).values(balance=running.c.balance),
+        execution_options={'synchronize_session': False},
+    )
+
+def apply_transactions(account_id, rows):
+    """Adds a batch of newly inserted transaction rows to the account's balance and daily balances.
+
+    Runs in the caller's transaction so balances commit together with the rows.
+    Only days on or after the batch's earliest date are rewritten, which for
+    statements arriving in date order is a handful of rows.
+    """
+    deltas = defaultdict(float)
+    for row in rows:
+        deltas[row['date'].date()] += float(row['amount'])
+    if not deltas:
+        return
+
+    # Updating the account first locks its row, so concurrent imports into
+    # the same account compute running balances one after the other.
+    db.session.execute(
+        update(Account).where(Account.id == account_id)
+        .values(balance=func.coalesce(Account.balance, 0) + round(sum(deltas.values()), 2)),
+        execution_options={'synchronize_session': False},
+    )
+    stmt = upsert_insert(DailyBalance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['account_id', 'day'],
+        set_={'net': DailyBalance.net + stmt.excluded.net},
+    )
+    db.session.execute(stmt, [
+        {'account_id': account_id, 'day': day, 'net': round(net, 2), 'balance': 0}
+        for day, net in deltas.items()
+    ])
+    _update_running_balances(account_id, min(deltas))
+
+@transactions_inserted.connect
+def _on_transactions_inserted(sender, account_id, rows):
+    apply_transactions(account_id, rows)
+
+def balance_on(account_id, day):
+    """Returns the account's closing balance on ``day``, a single index lookup."""
+    balance = db.session.scalar(
+        select(DailyBalance.balance)
+        .where(DailyBalance.account_id == account_id, DailyBalance.day <= day)
+        .order_by(DailyBalance.day.desc())
+        .limit(1)
+    )
+    return balance if balance is not None else 0
+
+def balance_history(account_id, start=None, end=None):
+    """Returns (day, closing balance) rows for days with transactions between ``start`` and ``end`` inclusive."""
+    query = select(DailyBalance.day, DailyBalance.balance).where(DailyBalance.account_id == account_id)
+    if start is not None:
+        query = query.where(DailyBalance.day >= start)
+    if end is not None:
+        query = query.where(DailyBalance.day <= end)
+    return db.session.execute(query.order_by(DailyBalance.day)).all()
+
+def _aggregate_query(account_id=None):
+    day = _day(Transaction.date)
+    query = select(
+        Transaction.account_id,
+        day.label('day'),
+        func.sum(Transaction.amount).label('net'),
+        func.sum(func.sum(Transaction.amount)).over(partition_by=Transaction.account_id, order_by=day)
+        .label('balance'),
+    ).group_by(Transaction.account_id, day)
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    return query
+
+def rebuild_statements(account_id=None):
+    """Statements recomputing daily balances and account balances from the transaction table."""
+    clear = delete(DailyBalance)
+    totals = update(Account).values(balance=select(func.coalesce(func.sum(Transaction.amount), 0))
+                                    .where(Transaction.account_id == Account.id).scalar_subquery())
+    if account_id is not None:
+        clear = clear.where(DailyBalance.account_id == account_id)
+        totals = totals.where(Account.id == account_id)
+    fill = DailyBalance.__table__.insert().from_select(
+        ['account_id', 'day', 'net', 'balance'], _aggregate_query(account_id))
+    return [clear, fill, totals]
+
+def rebuild_balances(account_id=None):
+    """Recomputes balances from the transaction table, for one account or all of them."""
+    for statement in rebuild_statements(account_id):
+        db.session.execute(statement, execution_options={'synchronize_session': False})
+    db.session.commit()
+
+def check_balances(account_id=None):
+    """Compares stored balances with a fresh aggregate and returns the mismatching (account, day) keys.
+
+    The account balance itself is reported with a day of None.
+    """
+    expected = {
+        (r.account_id, str(r.day)): (round(float(r.net or 0), 2), round(float(r.balance or 0), 2))
+        for r in db.session.execute(_aggregate_query(account_id))
+    }
+    stored_query = select(DailyBalance.account_id, DailyBalance.day, DailyBalance.net, DailyBalance.balance)
+    accounts_query = select(
+        Account.id, Account.balance,
+        select(func.coalesce(func.sum(Transaction.amount), 0))
+        .where(Transaction.account_id == Account.id).scalar_subquery().label('total'),
+    )
+    if account_id is not None:
+        stored_query = stored_query.where(DailyBalance.account_id == account_id)
+        accounts_query = accounts_query.where(Account.id == account_id)
+    stored = {
+        (r.account_id, str(r.day)): (round(float(r.net or 0), 2), round(float(r.balance or 0), 2))
+        for r in db.session.execute(stored_query)
+    }
+    mismatches = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+    mismatches += [
+        (r.id, None) for r in db.session.execute(accounts_query)
+        if round(float(r.balance or 0), 2) != round(float(r.total or 0), 2)
+    ]
+    return mismatches
+
+@balances_cli.command('check')
+@click.option('--account', 'account_id', type=int, help='Only check this account.')
+def check_command(account_id):
+    """Report balances that disagree with the transaction table."""
+    mismatches = check_balances(account_id)
+    for account, day in mismatches:
+        click.echo(f'Mismatch: account={account} ' + (f'day={day}' if day else 'balance'))
+    if mismatches:
+        raise SystemExit(f'{len(mismatches)} balances are out of date. Run "flask balances rebuild".')
+    click.echo('Balances are consistent.')
+
+@balances_cli.command('rebuild')
+@click.option('--account', 'account_id', type=int, help='Only rebuild this account.')
+def rebuild_command(account_id):
+    """Recompute account balances and the daily balance table from scratch."""
+    rebuild_balances(account_id)
+    click.echo('Balances rebuilt.')
@@ -0,0 +1,90 @@
+# app/caching.py
+
+import threading
+import time
+from collections import OrderedDict
+
+class FingerprintCache:
+    """Small in-process LRU cache for per-account results.
+
+    Keys are ``(account_id, fingerprint, *extra)``. Storing a value drops the
+    account's entries for older fingerprints, since those can never be hit again.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def set(self, key, value):
+        account_id, fingerprint = key[0], key[1]
+        with self._lock:
+            self._entries[key] = value
+            for stale in [k for k in self._entries if k[0] == account_id and k[1] != fingerprint]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, account_id):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == account_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class IdentityCache:
+    """Short-lived in-process cache of logged-in users, keyed by user id.
+
+    Each entry also records the user's account id so it can be dropped when
+    the account changes. Entries expire after ``ttl`` seconds; a ``ttl`` of 0
+    disables the cache.
+    """
+
+    def __init__(self, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, _, value = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def set(self, user_id, account_id, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, account_id, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None, account_id=None):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if account_id is not None:
+                for key in [k for k, (_, a, _) in self._entries.items() if a == account_id]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
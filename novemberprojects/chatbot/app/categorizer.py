@@ -0,0 +1,144 @@
+# app/categorizer.py
+
+import logging
+import os
+import threading
+import time
+import joblib
+import numpy as np
+from flask import current_app
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sqlalchemy import func, select
+from . import db
+from .models import Transaction
+
+# Character n-grams within words cope with merchant names like "AMZN MKTP US*2K4".
+# Hashing needs no fitted vocabulary, so vectorizing is stateless and shared.
+_vectorizer = HashingVectorizer(
+    analyzer='char_wb', ngram_range=(2, 4), n_features=2 ** 18,
+    alternate_sign=False, dtype=np.float32,
+)
+
+def is_missing(category):
+    # Only an empty category is missing; "Other" may be the user's choice.
+    return not (category or '').strip()
+
+class Categorizer:
+    """A linear model predicting an account's categories from transaction descriptions."""
+
+    def __init__(self, model, trained_on):
+        self.model = model
+        self.trained_on = trained_on
+
+    def predict(self, descriptions):
+        """Returns the most likely category and its probability for each description."""
+        probabilities = self.model.predict_proba(_vectorizer.transform(descriptions))
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
+
+    def fill_missing(self, rows, min_confidence):
+        """Sets the category of rows that have a description but an empty category.
+
+        Predictions below ``min_confidence`` are left empty. Returns the number
+        of rows categorized.
+        """
+        targets = [row for row in rows if row.get('description') and is_missing(row.get('category'))]
+        if not targets:
+            return 0
+        labels, confidence = self.predict([row['description'] for row in targets])
+        filled = 0
+        for row, label, p in zip(targets, labels, confidence):
+            if p >= min_confidence:
+                row['category'] = label
+                row['category_source'] = 'model'
+                filled += 1
+        return filled
+
+def _labelled(account_id):
+    # Categories the model predicted are left out, so it never learns from its own guesses.
+    return (Transaction.account_id == account_id,
+            Transaction.description.isnot(None),
+            Transaction.category_source == 'user')
+
+def labelled_count(account_id):
+    return db.session.scalar(select(func.count()).select_from(Transaction).where(*_labelled(account_id)))
+
+def train_categorizer(account_id, max_rows=50000, min_rows=50):
+    """Fits a categorizer on the account's most recent labelled rows.
+
+    Returns None if there are fewer than ``min_rows`` of them or only one category.
+    """
+    rows = db.session.execute(
+        select(Transaction.description, Transaction.category)
+        .where(*_labelled(account_id))
+        .order_by(Transaction.id.desc())
+        .limit(max_rows)
+    ).all()
+    if len(rows) < min_rows:
+        return None
+    descriptions = [description for description, _ in rows]
+    labels = np.array([category.strip() for _, category in rows])
+    if len(np.unique(labels)) < 2:
+        return None
+    model = SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=20, tol=None, random_state=0)
+    model.fit(_vectorizer.transform(descriptions), labels)
+    return Categorizer(model, trained_on=labelled_count(account_id))
+
+class CategorizerStore:
+    """Per-account categorizers, kept in memory and saved under CATEGORIZER_DIR.
+
+    A model is retrained once the account's labelled rows have grown by
+    CATEGORIZER_RETRAIN_GROWTH since it was trained.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path(account_id):
+        return os.path.join(current_app.config['CATEGORIZER_DIR'], f'account-{account_id}.joblib')
+
+    def _cached(self, account_id):
+        with self._lock:
+            categorizer = self._models.get(account_id)
+        if categorizer is None and os.path.exists(self._path(account_id)):
+            try:
+                categorizer = joblib.load(self._path(account_id))
+            except Exception:
+                logging.exception(f"Ignoring unreadable categorizer for account {account_id}")
+                return None
+            with self._lock:
+                self._models[account_id] = categorizer
+        return categorizer
+
+    def get(self, account_id):
+        """Returns the account's categorizer, training one if needed, or None if there isn't enough data."""
+        config = current_app.config
+        categorizer = self._cached(account_id)
+        labelled = labelled_count(account_id)
+        if categorizer is not None and labelled < categorizer.trained_on * (1 + config['CATEGORIZER_RETRAIN_GROWTH']):
+            return categorizer
+
+        start = time.perf_counter()
+        categorizer = train_categorizer(
+            account_id, max_rows=config['CATEGORIZER_MAX_ROWS'], min_rows=config['CATEGORIZER_MIN_ROWS'])
+        if categorizer is None:
+            return None
+        logging.info(f"Trained categorizer for account {account_id} on {categorizer.trained_on} rows "
+                     f"in {time.perf_counter() - start:.2f}s")
+        os.makedirs(config['CATEGORIZER_DIR'], exist_ok=True)
+        # Write then rename, so other workers never load a half-written file.
+        tmp_path = f'{self._path(account_id)}.{os.getpid()}.tmp'
+        joblib.dump(categorizer, tmp_path)
+        os.replace(tmp_path, self._path(account_id))
+        with self._lock:
+            self._models[account_id] = categorizer
+        return categorizer
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+categorizers = CategorizerStore()
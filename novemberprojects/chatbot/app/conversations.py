@@ -0,0 +1,68 @@
+# app/conversations.py
+
+from flask import current_app, session
+from flask_login import current_user
+from . import db
+from .models import Conversation, Message
+from .summaries import estimate_tokens
+
+def get_conversation(create=False):
+    """Returns the current user's conversation from the id kept in the session."""
+    conversation = None
+    conversation_id = session.get('conversation_id')
+    if conversation_id is not None:
+        conversation = db.session.get(Conversation, conversation_id)
+        if conversation is not None and conversation.user_id != current_user.id:
+            conversation = None
+    if conversation is None and create:
+        conversation = Conversation(user_id=current_user.id)
+        db.session.add(conversation)
+        db.session.commit()
+        session['conversation_id'] = conversation.id
+    return conversation
+
+def add_message(conversation, role, content):
+    message = Message(conversation_id=conversation.id, role=role, content=content)
+    db.session.add(message)
+    db.session.commit()
+    return message
+
+def delete_conversation(conversation):
+    Message.query.filter_by(conversation_id=conversation.id).delete()
+    db.session.delete(conversation)
+    db.session.commit()
+
+def history_window(conversation):
+    """Returns the most recent turns to send to the model, within a fixed size.
+
+    At most CHAT_HISTORY_WINDOW messages are kept, newest first until
+    CHAT_HISTORY_TOKEN_BUDGET is reached. Older turns are replaced by a short
+    note listing the earlier questions, so request size stays constant.
+    """
+    config = current_app.config
+    recent = conversation.messages.order_by(None).order_by(Message.id.desc())\
+        .limit(config['CHAT_HISTORY_WINDOW']).all()
+
+    window = []
+    used = 0
+    for message in recent:
+        cost = estimate_tokens(message.content)
+        if window and used + cost > config['CHAT_HISTORY_TOKEN_BUDGET']:
+            break
+        window.append(message)
+        used += cost
+    window.reverse()
+
+    history = [m.to_dict() for m in window]
+    if window:
+        earlier = conversation.messages.filter(Message.id < window[0].id)
+        omitted = earlier.count()
+        if omitted:
+            questions = earlier.filter_by(role='user').order_by(None)\
+                .order_by(Message.id.desc()).limit(5).all()
+            note = f"{omitted} earlier messages are not shown."
+            if questions:
+                asked = "; ".join(q.content[:80] for q in reversed(questions))
+                note += f" Earlier the user asked: {asked}"
+            history.insert(0, {'role': 'system', 'content': note})
+    return history
@@ -0,0 +1,72 @@
+# app/dashboard.py
+
+import os
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from . import db
+from .caching import FingerprintCache
+from .http_cache import file_digest, make_etag, static_assets
+from .models import Account, Transaction
+from .rollups import category_totals, transaction_fingerprint
+from .signals import transactions_inserted
+
+RECENT_TRANSACTIONS = 5
+# Everything the rendered page depends on besides the data.
+PAGE_FILES = ('templates/dashboard.html', 'templates/base.html')
+PAGE_ASSETS = ('css/style.css',)
+
+DashboardSnapshot = namedtuple('DashboardSnapshot', 'fingerprint balance transactions spending built_at')
+
+_cache = FingerprintCache()
+
+@transactions_inserted.connect
+def _on_transactions_inserted(sender, account_id, rows):
+    _cache.invalidate(account_id)
+
+def _build(account_id, fingerprint):
+    balance = db.session.scalar(select(Account.balance).where(Account.id == account_id))
+    transactions = [
+        {'date': t.date, 'amount': t.amount, 'category': t.category, 'description': t.description}
+        for t in db.session.execute(
+            select(Transaction.date, Transaction.amount, Transaction.category, Transaction.description)
+            .where(Transaction.account_id == account_id)
+            .order_by(Transaction.date.desc())
+            .limit(RECENT_TRANSACTIONS)
+        )
+    ]
+    spending = list(category_totals(account_id))
+    return DashboardSnapshot(fingerprint, balance, transactions, spending, datetime.utcnow().replace(microsecond=0))
+
+def dashboard_snapshot(account_id):
+    """Returns the account's balance, recent transactions and category totals.
+
+    The snapshot is kept in memory until a write changes the account's
+    transaction fingerprint, so unchanged dashboards cost one rollup query.
+    """
+    _cache.max_entries = current_app.config['DASHBOARD_CACHE_SIZE']
+    fingerprint = transaction_fingerprint(account_id)
+    key = (account_id, fingerprint)
+    snapshot = _cache.get(key)
+    if snapshot is None:
+        snapshot = _build(account_id, fingerprint)
+        _cache.set(key, snapshot)
+    return snapshot
+
+def dashboard_validators(user, snapshot, jobs):
+    """Returns the ETag and Last-Modified time for a dashboard page.
+
+    Import jobs are queried on every request since their progress changes
+    without touching transactions, so their state is part of the ETag.
+    """
+    app = current_app._get_current_object()
+    etag = make_etag(
+        user.id, user.username, snapshot.fingerprint, str(snapshot.balance),
+        [(job.id, job.status, job.rows_imported, job.rows_skipped, job.error) for job in jobs],
+        [file_digest(os.path.join(app.root_path, path)) for path in PAGE_FILES],
+        [static_assets.version(app, filename) for filename in PAGE_ASSETS],
+    )
+    last_modified = max([snapshot.built_at] + [job.finished_at or job.created_at for job in jobs
+                                               if job.finished_at or job.created_at])
+    return etag, last_modified
@@ -0,0 +1,51 @@
+# app/database.py
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from . import db
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def configure_engine_options(app):
+    """Fills in connection pool settings before the engine is created.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection.
+    """
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if _is_memory_sqlite(url):
+        return
+    options.setdefault('pool_size', app.config['DATABASE_POOL_SIZE'])
+    options.setdefault('max_overflow', app.config['DATABASE_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', app.config['DATABASE_POOL_TIMEOUT'])
+    options.setdefault('pool_pre_ping', True)
+
+def init_sqlite_pragmas(app, engine):
+    """Sets WAL journaling and a busy timeout on every new SQLite connection.
+
+    WAL lets readers run while one writer commits, and the busy timeout makes
+    a second writer wait for the lock instead of failing with
+    "database is locked".
+    """
+    if engine.dialect.name != 'sqlite' or _is_memory_sqlite(engine.url):
+        return
+    journal_mode = 'WAL' if app.config['SQLITE_WAL'] else 'DELETE'
+    busy_timeout = int(app.config['SQLITE_BUSY_TIMEOUT'])
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        if journal_mode == 'WAL':
+            # Safe with WAL: a crash can lose the last commits but never corrupts the file.
+            cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+def upsert_insert(table):
+    """Returns a dialect-specific INSERT that supports ON CONFLICT clauses."""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
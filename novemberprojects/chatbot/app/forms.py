@@ -1,9 +1,10 @@
 # app/forms.py
 
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, TextAreaField, FileField
+from wtforms import StringField, PasswordField, SubmitField, TextAreaField
 from wtforms.validators import DataRequired, EqualTo
-from flask_wtf.file import FileAllowed, FileRequired
+from flask_wtf.file import FileAllowed, FileRequired, MultipleFileField
+from .parsers import PARSERS
 
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -22,8 +23,8 @@ class ChatbotForm(FlaskForm):
     submit = SubmitField('Ask')
 
 class UploadForm(FlaskForm):
-    file = FileField('Upload CSV File', validators=[
+    file = MultipleFileField('Upload Statement Files', validators=[
         FileRequired(),
-        FileAllowed(['csv'], 'CSV files only!')
+        FileAllowed(sorted(ext.lstrip('.') for ext in PARSERS), 'CSV, OFX, QFX or JSON files only!')
     ])
     submit = SubmitField('Upload')
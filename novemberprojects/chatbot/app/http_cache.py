@@ -0,0 +1,93 @@
+# app/http_cache.py
+
+import hashlib
+import os
+import threading
+import time
+from flask import current_app, make_response, request, session
+from werkzeug.http import is_resource_modified
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+def file_digest(path):
+    """Returns a short content hash of a file, recomputed only when its mtime or size changes."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+    with _digests_lock:
+        _digests[path] = (key, digest)
+    return digest
+
+def make_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def conditional_response(etag, last_modified, render):
+    """Returns a 304 if the client's copy matches ``etag``, otherwise the response from ``render()``.
+
+    Pages are per user, so they may only be kept by the browser and must be
+    revalidated on every visit. Requests with flashed messages pending are
+    always rendered, since the messages are shown once and aren't in the ETag.
+    """
+    if not session.get('_flashes') and not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+class StaticAssets:
+    """Fingerprints static URLs and lets browsers cache fingerprinted files for a long time.
+
+    ``url_for('static', filename=...)`` gets a ``v`` argument holding a hash of
+    the file's contents, so a changed file gets a new URL. Requests whose ``v``
+    matches the current file are served with ``STATIC_MAX_AGE`` and ``immutable``.
+    """
+
+    def init_app(self, app):
+        app.url_defaults(self._add_version)
+        app.after_request(self._cache_headers)
+
+    @staticmethod
+    def _path(app, filename):
+        return os.path.join(app.static_folder, filename)
+
+    def version(self, app, filename):
+        try:
+            return file_digest(self._path(app, filename))
+        except OSError:
+            return None
+
+    def _add_version(self, endpoint, values):
+        if endpoint != 'static' or 'filename' not in values or 'v' in values:
+            return
+        version = self.version(current_app, values['filename'])
+        if version:
+            values['v'] = version
+
+    def _cache_headers(self, response):
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+        version = request.args.get('v')
+        if not version or version != self.version(current_app, request.view_args.get('filename', '')):
+            return response
+        max_age = current_app.config['STATIC_MAX_AGE']
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+        response.expires = int(time.time() + max_age)
+        return response
+
+static_assets = StaticAssets()
@@ -0,0 +1,99 @@
+# app/importer.py
+
+import hashlib
+import logging
+from . import db
+from .database import upsert_insert
+from .models import Transaction
+from .signals import transactions_inserted
+
+DEFAULT_BATCH_SIZE = 5000
+
+class TransactionImportError(Exception):
+    """Raised when an import fails part way; earlier batches stay committed."""
+    def __init__(self, message, rows_imported):
+        super().__init__(message)
+        self.rows_imported = rows_imported
+
+class ContentHasher:
+    """Hashes transaction contents for duplicate detection.
+
+    Identical rows within one statement are numbered, so two real same-day
+    purchases of the same amount are both kept while a re-import of the same
+    statement matches them one to one. Use one hasher per statement.
+    """
+
+    def __init__(self):
+        # Occurrences of each distinct row, keyed by the builtin hash to keep memory down.
+        self._seen = {}
+
+    def __call__(self, date, amount, category, description):
+        key = (date.isoformat() if date else '', f"{float(amount):.2f}",
+               (category or '').strip(), (description or '').strip())
+        occurrence = self._seen.get(hash(key), 0)
+        self._seen[hash(key)] = occurrence + 1
+        payload = '|'.join(key + (str(occurrence),)).encode()
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def import_transactions(rows, account_id, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                        categorize=None):
+    """Inserts transaction rows for an account in batches, skipping rows already imported.
+
+    Each batch is one multi-row INSERT ... ON CONFLICT DO NOTHING against the
+    (account_id, content_hash) unique index, returning the hashes that were
+    actually inserted. Only those rows are passed to the transactions_inserted
+    receivers, and the batch is committed together with whatever they derive
+    from it, so memory stays flat regardless of the input size. If given,
+    ``progress(batch_number, rows_imported, rows_skipped)`` is called after
+    each batch is inserted and before it is committed, so callers can record
+    progress in the same transaction. If given, ``categorize(batch)`` fills in
+    missing categories before the batch is inserted; rows are hashed first, so
+    a re-import still matches rows whose category was predicted. Returns
+    ``(rows_imported, rows_skipped)`` and raises TransactionImportError if a
+    batch fails.
+    """
+    stmt = upsert_insert(Transaction).on_conflict_do_nothing(
+        index_elements=['account_id', 'content_hash'],
+    ).returning(Transaction.content_hash)
+    batch = []
+    batch_number = 0
+    imported = 0
+    skipped = 0
+    content_hash = ContentHasher()
+
+    def flush():
+        nonlocal batch_number, imported, skipped
+        if categorize is not None:
+            categorize(batch)
+        # Executed on the session's connection to skip the ORM's per-row bulk insert bookkeeping.
+        inserted = set(db.session.connection().execute(stmt, batch).scalars())
+        new_rows = batch
+        if len(inserted) < len(batch):
+            new_rows = [row for row in batch if row['content_hash'] in inserted]
+        if new_rows:
+            transactions_inserted.send(account_id=account_id, rows=new_rows)
+        batch_number += 1
+        imported += len(new_rows)
+        skipped += len(batch) - len(new_rows)
+        if progress is not None:
+            progress(batch_number, imported, skipped)
+        db.session.commit()
+        logging.info(f"Imported batch {batch_number} ({imported} rows, {skipped} duplicates "
+                     f"skipped) for account {account_id}")
+        batch.clear()
+
+    try:
+        for row in rows:
+            row['content_hash'] = content_hash(row['date'], row['amount'],
+                                               row.get('category'), row.get('description'))
+            row['account_id'] = account_id
+            row['category_source'] = 'user' if (row.get('category') or '').strip() else None
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except Exception as e:
+        db.session.rollback()
+        raise TransactionImportError(str(e), imported) from e
+    return imported, skipped
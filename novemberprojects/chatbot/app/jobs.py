@@ -0,0 +1,193 @@
+# app/jobs.py
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.utils import secure_filename
+from . import db
+from .models import ImportJob
+from .importer import import_transactions, TransactionImportError
+from .parsers import parse_statement
+from .categorizer import categorizers
+
+UNFINISHED = ('queued', 'running')
+INTERRUPTED_ERROR = ('The import stopped when its server process exited. '
+                     'Upload the file again to import the remaining rows.')
+
+class ImportQueue:
+    """Runs transaction imports on a thread pool so request workers stay free.
+
+    Each upload is its own job, so several files import concurrently. Large
+    files are also parsed in chunks on a shared process pool.
+
+    Jobs live in the process that accepted the upload, which can die or be
+    recycled mid-import. A heartbeat thread stamps this process's unfinished
+    jobs every IMPORT_HEARTBEAT_SECONDS and marks jobs whose heartbeat is
+    older than IMPORT_STALE_SECONDS as interrupted, whichever process they
+    belonged to.
+    """
+
+    def __init__(self, app=None):
+        self.executor = None
+        self.parse_pool = None
+        self.active = set()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config['IMPORT_WORKERS'],
+            thread_name_prefix='import-job',
+        )
+        if app.config['IMPORT_PARSE_PROCESSES'] > 0:
+            # Worker processes start on first use; spawn avoids forking a threaded server.
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=app.config['IMPORT_PARSE_PROCESSES'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        app.extensions['import_queue'] = self
+        with app.app_context():
+            self.recover_stale_jobs()
+        threading.Thread(target=self._heartbeat, args=(app,), name='import-heartbeat', daemon=True).start()
+
+    def submit(self, file_storage, account_id):
+        """Saves an uploaded file, records a queued ImportJob and schedules it."""
+        filename = secure_filename(file_storage.filename or '') or 'upload'
+        path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}-{filename}")
+        file_storage.save(path)
+
+        job = ImportJob(filename=filename, account_id=account_id, path=path)
+        db.session.add(job)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        with self.lock:
+            self.active.add(job.id)
+        self.executor.submit(_run_import, app, job.id, path)
+        return job
+
+    def finished(self, job_id):
+        with self.lock:
+            self.active.discard(job_id)
+
+    def recover_stale_jobs(self):
+        """Marks unfinished jobs with no recent heartbeat as interrupted and removes their uploads.
+
+        Returns the number of jobs marked. Rows committed before the
+        interruption are kept; uploading the file again imports the rest,
+        since rows the account already has are skipped.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['IMPORT_STALE_SECONDS'])
+        recovered = 0
+        try:
+            stale = ImportJob.query.filter(
+                ImportJob.status.in_(UNFINISHED),
+                db.func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at) < cutoff,
+            ).all()
+            for job in stale:
+                # Several processes may sweep at once; the one whose update wins cleans up.
+                marked = db.session.execute(
+                    db.update(ImportJob)
+                    .where(ImportJob.id == job.id, ImportJob.status.in_(UNFINISHED))
+                    .values(status='interrupted', finished_at=datetime.utcnow(), error=INTERRUPTED_ERROR)
+                ).rowcount
+                db.session.commit()
+                if marked:
+                    logging.warning(f"Import job {job.id} has had no heartbeat since "
+                                    f"{job.heartbeat_at or job.created_at}; marked interrupted")
+                    if job.path:
+                        _remove_upload(job.path)
+                    recovered += 1
+        except SQLAlchemyError as e:
+            # E.g. before `flask schema upgrade` has added the heartbeat column.
+            db.session.rollback()
+            logging.warning(f"Couldn't check for interrupted import jobs: {getattr(e, 'orig', None) or e}")
+        finally:
+            db.session.remove()
+        return recovered
+
+    def _heartbeat(self, app):
+        interval = app.config['IMPORT_HEARTBEAT_SECONDS']
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                with self.lock:
+                    active = list(self.active)
+                try:
+                    if active:
+                        db.session.execute(db.update(ImportJob).where(ImportJob.id.in_(active))
+                                           .values(heartbeat_at=datetime.utcnow()))
+                        db.session.commit()
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    logging.warning(f"Import job heartbeat failed: {getattr(e, 'orig', None) or e}")
+                finally:
+                    db.session.remove()
+                self.recover_stale_jobs()
+
+import_queue = ImportQueue()
+
+def _run_import(app, job_id, path):
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'running'
+        db.session.commit()
+
+        def progress(batch_number, rows_imported, rows_skipped):
+            job.batches_done = batch_number
+            job.rows_imported = rows_imported
+            job.rows_skipped = rows_skipped
+
+        try:
+            rows = parse_statement(
+                path,
+                job.filename,
+                executor=app.extensions['import_queue'].parse_pool,
+                chunk_rows=app.config['IMPORT_CHUNK_ROWS'],
+                parallel_min_bytes=app.config['IMPORT_PARALLEL_MIN_BYTES'],
+            )
+            categorize = None
+            if app.config['CATEGORIZER_ENABLED']:
+                categorizer = categorizers.get(job.account_id)
+                if categorizer is not None:
+                    categorize = partial(categorizer.fill_missing,
+                                         min_confidence=app.config['CATEGORIZER_MIN_CONFIDENCE'])
+            import_transactions(
+                rows,
+                job.account_id,
+                batch_size=app.config['IMPORT_BATCH_SIZE'],
+                progress=progress,
+                categorize=categorize,
+            )
+            job.status = 'finished'
+        except TransactionImportError as e:
+            logging.error(f"Import job {job_id} failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+        except Exception as e:
+            logging.exception(f"Import job {job_id} crashed")
+            db.session.rollback()
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+            app.extensions['import_queue'].finished(job_id)
+            _remove_upload(path)
+
+def _remove_upload(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
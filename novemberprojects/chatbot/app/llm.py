@@ -0,0 +1,184 @@
+# app/llm.py
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+import aiohttp
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import LLM_FIRST_TOKEN_TIME, LLM_RETRIES, observe_llm
+
+# Errors worth retrying: throttling, timeouts, dropped connections and 5xx responses.
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain,
+)
+
+def _is_retryable(error):
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return isinstance(error, openai.error.APIError) and (error.http_status or 0) >= 500
+
+class LLMClient:
+    """Shared chat completions client with pooled connections, a concurrency limit,
+    retries with jittered exponential backoff and per-request timeouts.
+
+    The API key is passed on each request instead of being set on the openai
+    module, and OPENAI_API_BASE can point the client at a local stub server.
+    """
+
+    def __init__(self, app=None):
+        self._semaphore = None
+        self._async_state = weakref.WeakKeyDictionary()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.api_base = config['OPENAI_API_BASE']
+        self.timeout = (config['OPENAI_CONNECT_TIMEOUT'], config['OPENAI_READ_TIMEOUT'])
+        self.max_retries = config['OPENAI_MAX_RETRIES']
+        self.backoff_base = config['OPENAI_BACKOFF_BASE']
+        self.backoff_cap = config['OPENAI_BACKOFF_CAP']
+        self.max_concurrency = config['OPENAI_MAX_CONCURRENCY']
+        self.pool_size = config['OPENAI_POOL_SIZE']
+
+        # openai 0.28 keeps one session per thread, reusing its connections, and
+        # closes and replaces it every 3 minutes. Given a factory, it calls it
+        # for each new session, so every thread gets a session and pool of its
+        # own that it can close without affecting the others.
+        openai.requestssession = self._make_session
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        app.extensions['llm'] = self
+
+    @staticmethod
+    def _make_session():
+        # A thread makes one request at a time, so one kept-alive connection is enough.
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @staticmethod
+    def _api_key():
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            raise EnvironmentError("OpenAI API key not found. Set the OPENAI_API_KEY environment variable.")
+        return api_key
+
+    def _request_params(self, model, messages, params):
+        return dict(
+            model=model,
+            messages=messages,
+            api_key=self._api_key(),
+            api_base=self.api_base,
+            request_timeout=self.timeout,
+            **params,
+        )
+
+    def _backoff(self, attempt, error, operation):
+        LLM_RETRIES.inc(operation=operation)
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        retry_after = (getattr(error, 'headers', None) or {}).get('retry-after')
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        logging.warning(f"OpenAI request failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return delay
+
+    def chat(self, messages, model, **params):
+        """Returns the assistant's reply text for ``messages``."""
+        request = self._request_params(model, messages, params)
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with self._semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = openai.ChatCompletion.create(**request)
+                        outcome = 'ok'
+                        return response['choices'][0]['message']['content'].strip()
+                    except openai.OpenAIError as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                        time.sleep(self._backoff(attempt, e, 'chat'))
+        finally:
+            observe_llm('chat', model, time.perf_counter() - start, outcome)
+
+    def stream_chat(self, messages, model, **params):
+        """Yields the reply as content deltas. Only the initial request is retried."""
+        request = self._request_params(model, messages, dict(params, stream=True))
+        start = time.perf_counter()
+        first_token = True
+        outcome = 'error'
+        try:
+            with self._semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = openai.ChatCompletion.create(**request)
+                        break
+                    except openai.OpenAIError as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                        time.sleep(self._backoff(attempt, e, 'stream'))
+                for chunk in response:
+                    delta = chunk['choices'][0].get('delta', {}).get('content')
+                    if delta:
+                        if first_token:
+                            LLM_FIRST_TOKEN_TIME.observe(time.perf_counter() - start, model=model)
+                            first_token = False
+                        yield delta
+                outcome = 'ok'
+        finally:
+            observe_llm('stream', model, time.perf_counter() - start, outcome)
+
+    def _loop_state(self):
+        """Returns the aiohttp session and semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        state = self._async_state.get(loop)
+        if state is None or state[0].closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            state = (aiohttp.ClientSession(connector=connector), asyncio.Semaphore(self.max_concurrency))
+            self._async_state[loop] = state
+        return state
+
+    async def achat(self, messages, model, **params):
+        """Async version of chat() sharing one pooled aiohttp session per event loop."""
+        request = self._request_params(model, messages, params)
+        session, semaphore = self._loop_state()
+        token = openai.aiosession.set(session)
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = await openai.ChatCompletion.acreate(**request)
+                        outcome = 'ok'
+                        return response['choices'][0]['message']['content'].strip()
+                    except openai.OpenAIError as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                        await asyncio.sleep(self._backoff(attempt, e, 'achat'))
+        finally:
+            openai.aiosession.reset(token)
+            observe_llm('achat', model, time.perf_counter() - start, outcome)
+
+    async def aclose(self):
+        """Closes the aiohttp session for the running event loop."""
+        state = self._async_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+llm_client = LLMClient()
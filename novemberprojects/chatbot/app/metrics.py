@@ -0,0 +1,275 @@
+# app/metrics.py
+
+import cProfile
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from flask import Response, abort, current_app, g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from . import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Held by the request being profiled. Only one request per process is
+# profiled at a time: cProfile can't run two profilers at once on Python
+# 3.12+ (sys.monitoring), and before that one request's profile would pick up
+# other threads' work.
+_profile_lock = threading.Lock()
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonic counter with optional labels, exported in Prometheus text format."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, exported in Prometheus text format."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {count}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {count}'
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to handle a request, including streamed bodies.',
+    ('endpoint', 'method', 'status'))
+REQUEST_SQL_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL statements executed per request.', ('endpoint',), COUNT_BUCKETS)
+REQUEST_SQL_TIME = Histogram(
+    'http_request_sql_duration_seconds', 'Total SQL time per request.', ('endpoint',))
+REQUEST_LLM_TIME = Histogram(
+    'http_request_llm_duration_seconds', 'Total OpenAI time per request.', ('endpoint',), LLM_BUCKETS)
+SQL_QUERY_TIME = Histogram(
+    'sql_query_duration_seconds', 'Time of individual SQL statements.', ('endpoint',), SQL_BUCKETS)
+TEMPLATE_RENDER_TIME = Histogram(
+    'template_render_duration_seconds', 'Time to render a template.', ('template',))
+LLM_REQUEST_TIME = Histogram(
+    'llm_request_duration_seconds', 'Time of OpenAI calls, including retries.',
+    ('operation', 'model', 'outcome'), LLM_BUCKETS)
+LLM_FIRST_TOKEN_TIME = Histogram(
+    'llm_time_to_first_token_seconds', 'Time until the first streamed token arrives.', ('model',), LLM_BUCKETS)
+LLM_RETRIES = Counter('llm_retries', 'OpenAI requests retried after a transient error.', ('operation',))
+
+REGISTRY = [
+    REQUEST_LATENCY, REQUEST_SQL_QUERIES, REQUEST_SQL_TIME, REQUEST_LLM_TIME, SQL_QUERY_TIME,
+    TEMPLATE_RENDER_TIME, LLM_REQUEST_TIME, LLM_FIRST_TOKEN_TIME, LLM_RETRIES,
+]
+
+def render_metrics(registry=REGISTRY):
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+class RequestStats:
+    """Time spent by the current request, shared with its streamed body."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.llm_time = 0.0
+
+def _current_stats():
+    return g.get('_request_stats') if has_request_context() else None
+
+def _endpoint():
+    stats = _current_stats()
+    return stats.endpoint if stats else 'background'
+
+def observe_llm(operation, model, seconds, outcome):
+    """Records an OpenAI call. Called by the LLM client."""
+    LLM_REQUEST_TIME.observe(seconds, operation=operation, model=model, outcome=outcome)
+    stats = _current_stats()
+    if stats is not None:
+        stats.llm_time += seconds
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['_query_start'].pop()
+    SQL_QUERY_TIME.observe(elapsed, endpoint=_endpoint())
+    stats = _current_stats()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+
+def _handle_error(context):
+    # The statement failed, so after_cursor_execute won't pop its start time.
+    starts = context.connection.info.get('_query_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def _before_render(sender, template, context, **extra):
+    g.setdefault('_render_start', []).append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+    starts = g.get('_render_start')
+    if starts:
+        TEMPLATE_RENDER_TIME.observe(time.perf_counter() - starts.pop(), template=template.name or 'string')
+
+class Instrumentation:
+    """Per-request latency, SQL, template and OpenAI timings, a Prometheus
+    ``/metrics`` endpoint and an opt-in profiler that dumps slow requests.
+
+    Metrics are kept in process memory, so with several server processes
+    each one reports its own numbers.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if app.config['METRICS_ENABLED']:
+            app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        if app.config['PROFILE_REQUESTS']:
+            os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        app.extensions['instrumentation'] = self
+
+    @staticmethod
+    def metrics_view():
+        token = current_app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    @staticmethod
+    def _before_request():
+        g._request_stats = RequestStats(request.endpoint or 'unmatched')
+        # Requests that arrive while another one is being profiled go unprofiled.
+        if current_app.config['PROFILE_REQUESTS'] and _profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler, not started here, is already running.
+                _profile_lock.release()
+                return
+            g._profiler = profiler
+
+    @staticmethod
+    def _after_request(response):
+        stats = g.get('_request_stats')
+        if stats is None:
+            return response
+        method, status = request.method, response.status_code
+
+        def record():
+            REQUEST_LATENCY.observe(time.perf_counter() - stats.start,
+                                    endpoint=stats.endpoint, method=method, status=status)
+            REQUEST_SQL_QUERIES.observe(stats.sql_count, endpoint=stats.endpoint)
+            REQUEST_SQL_TIME.observe(stats.sql_time, endpoint=stats.endpoint)
+            if stats.llm_time:
+                REQUEST_LLM_TIME.observe(stats.llm_time, endpoint=stats.endpoint)
+
+        if response.is_streamed:
+            # Record once the server has sent the whole body.
+            response.call_on_close(record)
+        else:
+            record()
+        response.headers['Server-Timing'] = (
+            f'app;dur={(time.perf_counter() - stats.start) * 1000:.1f}, '
+            f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"'
+        )
+        return response
+
+    @staticmethod
+    def _teardown_request(exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return
+        profiler.disable()
+        _profile_lock.release()
+        stats = g.get('_request_stats')
+        if stats is None:
+            return
+        elapsed_ms = (time.perf_counter() - stats.start) * 1000
+        if elapsed_ms < current_app.config['PROFILE_SLOW_MS']:
+            return
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{stats.endpoint}-{elapsed_ms:.0f}ms.prof"
+        path = os.path.join(current_app.config['PROFILE_DIR'], name)
+        profiler.dump_stats(path)
+        logging.warning(f"Slow request {request.method} {request.path} took {elapsed_ms:.0f} ms; profile saved to {path}")
+
+instrumentation = Instrumentation()
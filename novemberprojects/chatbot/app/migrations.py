@@ -0,0 +1,158 @@
+# app/migrations.py
+
+from collections import defaultdict
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, inspect, select, text
+from . import db
+
+schema_cli = AppGroup('schema', help='Create and upgrade the database schema.')
+
+def _add_column(table, column, ddl):
+    """Returns a migration step adding a column, skipped if create_all already made it
+    (tables that are new in this release are created from the current models)."""
+    def step(conn):
+        if column not in {c['name'] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+    return step
+
+def _backfill_content_hashes(conn, page_size=50000):
+    """Hashes existing transactions in id order, numbering identical rows per account
+    the same way the importer numbers them within a statement."""
+    from .importer import ContentHasher
+    from .models import Transaction
+    table = Transaction.__table__
+    hashers = defaultdict(ContentHasher)
+    update = table.update().where(table.c.id == bindparam('_id')).values(content_hash=bindparam('_hash'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.account_id, table.c.date, table.c.amount,
+                   table.c.category, table.c.description)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(page_size)
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [
+            {'_id': row.id, '_hash': hashers[row.account_id](row.date, row.amount or 0, row.category, row.description)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+def _backfill_balances(conn):
+    from .balances import rebuild_statements
+    for statement in rebuild_statements():
+        conn.execute(statement)
+
+# Ordered list of (name, statements). Statements are plain SQL strings or
+# callables taking a connection. Never edit an entry once it has shipped;
+# append a new one instead.
+MIGRATIONS = [
+    ('0001_transaction_composite_indexes', [
+        'CREATE INDEX IF NOT EXISTS ix_transaction_account_date ON "transaction" (account_id, date DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_transaction_account_category ON "transaction" (account_id, category)',
+    ]),
+    ('0002_savings_plan_progress', [
+        _add_column('savings_plan', 'start_date', 'DATE'),
+        _add_column('savings_plan', 'starting_amount', 'NUMERIC(10, 2)'),
+        _add_column('savings_plan', 'projected_date', 'DATE'),
+        'UPDATE savings_plan SET start_date = COALESCE(start_date, CURRENT_DATE), '
+        'starting_amount = COALESCE(starting_amount, current_amount, 0)',
+    ]),
+    ('0003_transaction_content_hash', [
+        _add_column('transaction', 'content_hash', 'VARCHAR(32)'),
+        _add_column('import_job', 'rows_skipped', 'INTEGER DEFAULT 0'),
+        _backfill_content_hashes,
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_transaction_account_content_hash '
+        'ON "transaction" (account_id, content_hash)',
+    ]),
+    ('0004_account_balances', [
+        _backfill_balances,
+    ]),
+    ('0005_import_job_heartbeat', [
+        _add_column('import_job', 'heartbeat_at', 'TIMESTAMP'),
+        _add_column('import_job', 'path', 'VARCHAR(500)'),
+    ]),
+    ('0006_transaction_category_source', [
+        _add_column('transaction', 'category_source', 'VARCHAR(10)'),
+        # Earlier predictions can't be told apart from statement categories.
+        'UPDATE "transaction" SET category_source = \'user\' '
+        'WHERE category_source IS NULL AND TRIM(COALESCE(category, \'\')) <> \'\'',
+    ]),
+]
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migration ('
+        'name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)'
+    ))
+
+def applied_migrations(conn):
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text('SELECT name FROM schema_migration'))}
+
+def _record(conn, name):
+    conn.execute(
+        text('INSERT INTO schema_migration (name, applied_at) VALUES (:name, :applied_at)'),
+        {'name': name, 'applied_at': datetime.utcnow()},
+    )
+
+def matches_models(conn):
+    """Returns True if every model table that exists has all of its model's columns and indexes."""
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {c['name'] for c in inspector.get_columns(table.name)}
+        indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+        if not {c.name for c in table.columns} <= columns or not {i.name for i in table.indexes} <= indexes:
+            return False
+    return True
+
+def upgrade():
+    """Creates missing tables and applies pending migrations. Returns the names applied.
+
+    A database with no migrations recorded whose tables already match the
+    models, either brand-new or built with ``db.create_all()``, gets any
+    missing tables from the models and every migration is recorded as
+    applied without running it. Migration steps must still be safe to run
+    on a schema that already has their changes.
+    """
+    with db.engine.begin() as conn:
+        fresh = not applied_migrations(conn) and matches_models(conn)
+    db.create_all()
+    applied = []
+    with db.engine.begin() as conn:
+        done = applied_migrations(conn)
+        for name, statements in MIGRATIONS:
+            if name in done:
+                continue
+            if not fresh:
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(text(statement))
+            _record(conn, name)
+            applied.append(name)
+        if not fresh and applied and conn.dialect.name == 'sqlite':
+            # Refresh planner statistics so the new indexes get used.
+            conn.execute(text('ANALYZE'))
+    return applied
+
+@schema_cli.command('upgrade')
+def upgrade_command():
+    """Create missing tables and apply pending migrations."""
+    applied = upgrade()
+    for name in applied:
+        click.echo(f'Applied {name}')
+    click.echo('Schema is up to date.')
+
+@schema_cli.command('status')
+def status_command():
+    """List migrations and whether they have been applied."""
+    with db.engine.begin() as conn:
+        done = applied_migrations(conn)
+    for name, _ in MIGRATIONS:
+        click.echo(f"[{'x' if name in done else ' '}] {name}")
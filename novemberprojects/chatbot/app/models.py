@@ -1,8 +1,16 @@
 # app/models.py
 
 from . import db, login
+from flask import current_app
 from flask_login import UserMixin
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import date, datetime
+from .caching import IdentityCache
+from .signals import transactions_inserted
+
+identity_cache = IdentityCache()
 
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
@@ -13,6 +21,8 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
+        if self.id is not None:
+            identity_cache.invalidate(self.id)
         
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -20,9 +30,39 @@ class User(UserMixin, db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+def _columns(instance):
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+def _detached_user(user_columns, account_columns):
+    """Rebuilds a user and its account from cached column values without a query."""
+    user = User(**user_columns)
+    user.account = Account(**account_columns) if account_columns else None
+    make_transient_to_detached(user)
+    if user.account is not None:
+        make_transient_to_detached(user.account)
+    return user
+
 @login.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Loads the user with their account in one query, or from the identity cache.
+
+    Cached users are merged into the session without loading, so requests that
+    only need ``current_user`` and ``current_user.account`` run no query for them.
+    """
+    config = current_app.config
+    identity_cache.ttl = config['USER_CACHE_TTL']
+    identity_cache.max_entries = config['USER_CACHE_SIZE']
+    user_id = int(user_id)
+    cached = identity_cache.get(user_id)
+    if cached is not None:
+        return db.session.merge(_detached_user(*cached), load=False)
+
+    user = db.session.get(User, user_id, options=[joinedload(User.account)])
+    if user is not None:
+        account = user.account
+        identity_cache.set(user_id, account.id if account else None,
+                           (_columns(user), _columns(account) if account else None))
+    return user
 
 class Account(db.Model):
     __tablename__ = 'account'
@@ -35,6 +75,11 @@ class Account(db.Model):
     def __repr__(self):
         return f'<Account {self.id}>'
 
+@transactions_inserted.connect
+def _on_transactions_inserted(sender, account_id, rows):
+    # The cached account may now be out of date.
+    identity_cache.invalidate(account_id=account_id)
+
 class Transaction(db.Model):
     __tablename__ = 'transaction'
     id = db.Column(db.Integer, primary_key=True)
@@ -43,10 +88,51 @@ class Transaction(db.Model):
     category = db.Column(db.String(50))
     description = db.Column(db.String(255))
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'))
+    # Identifies a row across re-imports of overlapping statements; see importer.ContentHasher.
+    content_hash = db.Column(db.String(32))
+    # 'user' for categories from the statement, 'model' for ones the categorizer
+    # predicted, None while uncategorized. Only 'user' rows train the categorizer.
+    category_source = db.Column(db.String(10))
 
     def __repr__(self):
         return f'<Transaction {self.id}>'
 
+# Hot queries filter by account and then sort by date or group by category.
+db.Index('ix_transaction_account_date', Transaction.account_id, Transaction.date.desc())
+db.Index('ix_transaction_account_category', Transaction.account_id, Transaction.category)
+db.Index('uq_transaction_account_content_hash', Transaction.account_id, Transaction.content_hash, unique=True)
+
+class CategoryTotal(db.Model):
+    """Per-account spending rollup by category and month, kept in step with inserts."""
+    __tablename__ = 'category_total'
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'category', 'month', name='uq_category_total_account_category_month'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+    category = db.Column(db.String(50), nullable=False, default='')
+    month = db.Column(db.String(7), nullable=False)  # 'YYYY-MM'
+    total = db.Column(db.Numeric(12, 2), default=0.00)
+    count = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f'<CategoryTotal {self.account_id} {self.category} {self.month}>'
+
+class DailyBalance(db.Model):
+    """Per-account net flow and closing balance for each day with transactions, kept in step with inserts."""
+    __tablename__ = 'daily_balance'
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'day', name='uq_daily_balance_account_day'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    net = db.Column(db.Numeric(14, 2), default=0.00)
+    balance = db.Column(db.Numeric(14, 2), default=0.00)
+
+    def __repr__(self):
+        return f'<DailyBalance {self.account_id} {self.day}>'
+
 class SavingsPlan(db.Model):
     __tablename__ = 'savings_plan'
     id = db.Column(db.Integer, primary_key=True)
@@ -55,6 +141,79 @@ class SavingsPlan(db.Model):
     current_amount = db.Column(db.Numeric(10, 2), default=0.00)
     target_date = db.Column(db.Date)
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'))
+    # Progress is starting_amount plus the account's net flow since start_date.
+    start_date = db.Column(db.Date, default=date.today)
+    starting_amount = db.Column(db.Numeric(10, 2), default=0.00)
+    projected_date = db.Column(db.Date)
 
     def __repr__(self):
         return f'<SavingsPlan {self.goal_name}>'
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_job'
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='queued', index=True)
+    batches_done = db.Column(db.Integer, default=0)
+    rows_imported = db.Column(db.Integer, default=0)
+    rows_skipped = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    # Touched periodically by the process running the job; see jobs.ImportQueue.
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+    path = db.Column(db.String(500))
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'batches_done': self.batches_done,
+            'rows_imported': self.rows_imported,
+            'rows_skipped': self.rows_skipped,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status}>'
+
+class AdviceCacheEntry(db.Model):
+    """Cached financial advice, keyed by a hash of the account's transactions, model and prompt version."""
+    __tablename__ = 'advice_cache'
+    key = db.Column(db.String(64), primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), index=True)
+    advice = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<AdviceCacheEntry {self.key[:12]}>'
+
+class Conversation(db.Model):
+    __tablename__ = 'conversation'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    messages = db.relationship('Message', backref='conversation', lazy='dynamic', order_by='Message.id')
+
+    def __repr__(self):
+        return f'<Conversation {self.id}>'
+
+class Message(db.Model):
+    __tablename__ = 'message'
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), index=True)
+    role = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {'role': self.role, 'content': self.content}
+
+    def __repr__(self):
+        return f'<Message {self.id} {self.role}>'
@@ -0,0 +1,354 @@
+# app/parsers.py
+
+import csv
+import io
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime
+
+DEFAULT_CHUNK_ROWS = 20000
+SNIFF_BYTES = 64 * 1024
+SNIFF_ROWS = 200
+# Chunks waiting on the pool at once, so large files aren't read into memory.
+MAX_IN_FLIGHT = 2 * (os.cpu_count() or 1)
+
+# Column or key names accepted for each transaction field, lower-cased.
+FIELD_ALIASES = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date', 'posted', 'booking date', 'dtposted'),
+    'amount': ('amount', 'amt', 'value', 'transaction amount', 'trnamt'),
+    'category': ('category', 'type', 'trntype'),
+    'description': ('description', 'memo', 'name', 'payee', 'details', 'narrative'),
+}
+
+# Tried in order; the first format that parses every sampled date wins.
+DATE_FORMATS = (
+    '%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%d/%m/%Y', '%d.%m.%Y', '%m-%d-%Y', '%d-%m-%Y',
+    '%m/%d/%y', '%d/%m/%y', '%Y%m%d', '%d %b %Y', '%b %d, %Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S',
+)
+
+PARSERS = {}
+
+class StatementParseError(ValueError):
+    """Raised when a statement file can't be read as transactions."""
+
+def parser(*extensions):
+    """Registers a parser for the given file extensions.
+
+    A parser is called as ``parse(path, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS)``
+    and yields transaction dicts with date, amount, category and description.
+    """
+    def register(fn):
+        for extension in extensions:
+            PARSERS[extension] = fn
+        return fn
+    return register
+
+def sniff_date_format(values):
+    values = [v.strip() for v in values if v and v.strip()]
+    for fmt in DATE_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return fmt
+    raise StatementParseError(f"Unrecognised date format, e.g. {values[0]!r}" if values else "No dates found")
+
+CURRENCY_NOISE = re.compile(r'[\s$€£]')
+
+def _amount_pattern(decimal_separator):
+    thousands = re.escape(',' if decimal_separator == '.' else '.')
+    decimal = re.escape(decimal_separator)
+    # Thousands separators only between groups of three digits, as in "1,234,567.89".
+    return re.compile(rf'[-+]?(?=\d|{decimal}\d)(?:\d{{1,3}}(?:{thousands}\d{{3}})+|\d*)(?:{decimal}\d+)?')
+
+AMOUNT_PATTERNS = {'.': _amount_pattern('.'), ',': _amount_pattern(',')}
+
+def _clean_amount(text):
+    return CURRENCY_NOISE.sub('', text)
+
+def amount_decimal_separator(text):
+    """Returns the decimal separator an amount must be using, or None if it doesn't show.
+
+    When both '.' and ',' appear the last one is the decimal separator, and a
+    separator that repeats can only be separating thousands. A single
+    separator followed by three digits, as in "1,234" or "1.234", could be
+    either and gives None, as does a whole number.
+    """
+    marks = [c for c in _clean_amount(text) if c in '.,']
+    if not marks:
+        return None
+    last = marks[-1]
+    if len(set(marks)) == 2:
+        return last
+    other = ',' if last == '.' else '.'
+    if len(marks) > 1:
+        return other
+    digits = _clean_amount(text).strip('()')
+    integer, fraction = digits.rsplit(last, 1)
+    if len(fraction) != 3 or integer.lstrip('+-') in ('', '0'):
+        return last
+    return None
+
+def sniff_decimal_separator(values):
+    """Works out a file's decimal separator from sampled amounts; None if no amount shows it."""
+    found = {amount_decimal_separator(v) for v in values if isinstance(v, str)} - {None}
+    if len(found) > 1:
+        raise StatementParseError("Amounts mix '.' and ',' as the decimal separator")
+    return found.pop() if found else None
+
+def parse_amount(value, decimal_separator=None):
+    """Parses an amount like "-1,234.56", "(12.50)" or "€ 1.234,00".
+
+    ``decimal_separator`` is the file's convention, from
+    :func:`sniff_decimal_separator`. Without one, the separator is taken from
+    the value itself, and a value that reads either way is rejected rather
+    than guessed at.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = _clean_amount(value)
+    negative = text.startswith('(') and text.endswith(')')
+    text = text.strip('()')
+    separator = decimal_separator or amount_decimal_separator(text)
+    if separator is None:
+        if ',' in text or '.' in text:
+            raise ValueError(f"ambiguous amount {value!r}: can't tell the decimal separator from thousands")
+        separator = '.'
+    if not AMOUNT_PATTERNS[separator].fullmatch(text):
+        raise ValueError(f"invalid amount {value!r}")
+    amount = float(text.replace(',' if separator == '.' else '.', '').replace(separator, '.'))
+    return -amount if negative else amount
+
+def _field_columns(header):
+    """Maps each field to its column index, or returns None if ``header`` isn't a header row."""
+    names = [cell.strip().lower() for cell in header]
+    columns = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if 'date' in columns and 'amount' in columns:
+        return columns
+    return None
+
+def _positional_columns(width):
+    # Files without a header use the original layout: date, amount, category, description.
+    if width >= 4:
+        return {'date': 0, 'amount': 1, 'category': 2, 'description': 3}
+    if width == 3:
+        return {'date': 0, 'amount': 1, 'description': 2}
+    raise StatementParseError(f"Expected at least 3 columns, found {width}")
+
+def _record(values, date_format, decimal_separator=None):
+    missing = [field for field in ('date', 'amount') if values.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing {' and '.join(missing)}")
+    return {
+        'date': datetime.strptime(str(values['date']).strip(), date_format),
+        'amount': parse_amount(values['amount'], decimal_separator),
+        'category': str(values.get('category') or '').strip(),
+        'description': str(values.get('description') or '').strip(),
+    }
+
+def _map_chunks(fn, chunks, executor):
+    """Runs ``fn`` over chunks, on ``executor`` if given, and yields the rows in input order."""
+    if executor is None:
+        for args in chunks:
+            yield from fn(*args)
+        return
+    pending = deque()
+    for args in chunks:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= MAX_IN_FLIGHT:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+# CSV
+
+def _dialect_options(dialect):
+    # csv.Sniffer returns a class that can't be pickled, so pass its settings instead.
+    return {name: getattr(dialect, name) for name in
+            ('delimiter', 'quotechar', 'doublequote', 'skipinitialspace', 'escapechar', 'quoting')}
+
+def _sniff_dialect(sample):
+    try:
+        return _dialect_options(csv.Sniffer().sniff(sample, delimiters=',;\t|'))
+    except csv.Error:
+        return _dialect_options(csv.excel)
+
+def _csv_chunks(f, quotechar, chunk_rows, first_line):
+    """Splits the rest of a CSV file into chunks of whole records.
+
+    A line ends a record when it leaves an even number of quote characters
+    open, so quoted fields containing newlines stay in one chunk.
+    """
+    lines = []
+    records = 0
+    quotes = 0
+    line_number = start = first_line
+    for line in f:
+        lines.append(line)
+        line_number += 1
+        quotes += line.count(quotechar) if quotechar else 0
+        if quotes % 2 == 0:
+            records += 1
+            if records >= chunk_rows:
+                yield ''.join(lines), start
+                lines, records, start = [], 0, line_number
+    if lines:
+        yield ''.join(lines), start
+
+def _parse_csv_chunk(text, dialect, columns, date_format, decimal_separator, first_line):
+    rows = []
+    reader = csv.reader(io.StringIO(text), **dialect)
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        try:
+            rows.append(_record({field: row[index] for field, index in columns.items() if index < len(row)},
+                                date_format, decimal_separator))
+        except ValueError as e:
+            raise StatementParseError(f"line {first_line + reader.line_num - 1}: {e}") from None
+    return rows
+
+@parser('.csv', '.txt')
+def parse_csv(path, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Parses a delimited file, sniffing the delimiter, the header, the date format and the decimal separator."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(SNIFF_BYTES)
+        dialect = _sniff_dialect(sample)
+        sample_rows = [row for row in csv.reader(io.StringIO(sample), **dialect) if row]
+        if not sample_rows:
+            return
+        columns = _field_columns(sample_rows[0])
+        has_header = columns is not None
+        if not has_header:
+            columns = _positional_columns(len(sample_rows[0]))
+        data_rows = sample_rows[1:] if has_header else sample_rows
+        if len(sample) == SNIFF_BYTES:
+            # The last sampled row may have been cut off.
+            data_rows = data_rows[:-1]
+        date_format = sniff_date_format([row[columns['date']] for row in data_rows[:SNIFF_ROWS]
+                                         if len(row) > columns['date']])
+        decimal_separator = sniff_decimal_separator([row[columns['amount']] for row in data_rows
+                                                     if len(row) > columns['amount']])
+
+        f.seek(0)
+        first_line = 1
+        if has_header:
+            next(csv.reader(f, **dialect))
+            first_line = 2
+        chunks = ((text, dialect, columns, date_format, decimal_separator, start)
+                  for text, start in _csv_chunks(f, dialect['quotechar'], chunk_rows, first_line))
+        yield from _map_chunks(_parse_csv_chunk, chunks, executor)
+
+# JSON
+
+def _json_fields(record):
+    keys = {key.strip().lower(): key for key in record}
+    values = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in keys:
+                values[field] = record[keys[alias]]
+                break
+    return values
+
+def _parse_json_records(records, date_format, decimal_separator, first_line=None):
+    rows = []
+    for i, record in enumerate(records):
+        try:
+            rows.append(_record(_json_fields(record), date_format, decimal_separator))
+        except (ValueError, TypeError, AttributeError) as e:
+            where = f"line {first_line + i}" if first_line is not None else f"record {i + 1}"
+            raise StatementParseError(f"{where}: {e}") from None
+    return rows
+
+def _parse_json_lines_chunk(text, date_format, decimal_separator, first_line):
+    return _parse_json_records([json.loads(line) for line in text.splitlines() if line.strip()],
+                               date_format, decimal_separator, first_line)
+
+@parser('.json')
+def parse_json(path, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Parses a JSON list of transactions, or an object holding one under ``transactions``."""
+    with open(path, encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('transactions', next((v for v in data.values() if isinstance(v, list)), []))
+    if not isinstance(data, list):
+        raise StatementParseError("Expected a list of transactions")
+    date_format = sniff_date_format([str(_json_fields(r).get('date', '')) for r in data[:SNIFF_ROWS]])
+    decimal_separator = sniff_decimal_separator([_json_fields(r).get('amount') for r in data])
+    yield from _parse_json_records(data, date_format, decimal_separator)
+
+@parser('.jsonl', '.ndjson')
+def parse_json_lines(path, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Parses one JSON transaction per line, in parallel chunks when an executor is given."""
+    with open(path, encoding='utf-8-sig') as f:
+        head = [json.loads(line) for _, line in zip(range(SNIFF_ROWS), f) if line.strip()]
+        date_format = sniff_date_format([str(_json_fields(r).get('date', '')) for r in head])
+        decimal_separator = sniff_decimal_separator([_json_fields(r).get('amount') for r in head])
+        f.seek(0)
+        chunks = ((text, date_format, decimal_separator, start) for text, start in _csv_chunks(f, None, chunk_rows, 1))
+        yield from _map_chunks(_parse_json_lines_chunk, chunks, executor)
+
+# OFX / QFX
+
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+@parser('.ofx', '.qfx')
+def parse_ofx(path, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Parses the transactions of an OFX or QFX statement, SGML (1.x) or XML (2.x).
+
+    Statements are small, so this is a single regex pass without the pool.
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    transactions = [{name.upper(): value.strip() for name, value in OFX_FIELD.findall(block)}
+                    for block in OFX_TRANSACTION.findall(text)]
+    decimal_separator = sniff_decimal_separator([fields.get('TRNAMT') for fields in transactions])
+    for number, fields in enumerate(transactions, 1):
+        try:
+            yield {
+                # DTPOSTED is YYYYMMDD, optionally followed by a time and time zone.
+                'date': datetime.strptime(fields['DTPOSTED'][:8], '%Y%m%d'),
+                'amount': parse_amount(fields['TRNAMT'], decimal_separator),
+                'category': '',
+                'description': fields.get('NAME') or fields.get('MEMO') or '',
+            }
+        except KeyError as e:
+            raise StatementParseError(f"transaction {number}: missing {e}") from None
+        except ValueError as e:
+            raise StatementParseError(f"transaction {number}: {e}") from None
+
+def detect_parser(path, filename=None):
+    """Picks a parser by file extension, falling back to the file's first bytes."""
+    extension = os.path.splitext(filename or path)[1].lower()
+    if extension in PARSERS:
+        return PARSERS[extension]
+    with open(path, 'rb') as f:
+        head = f.read(1024).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if b'OFXHEADER' in head.upper() or b'<OFX>' in head.upper():
+        return PARSERS['.ofx']
+    if head.startswith(b'['):
+        return PARSERS['.json']
+    if head.startswith(b'{'):
+        # One object per line is JSON Lines; anything else is a single document.
+        return PARSERS['.jsonl'] if re.match(rb'\{[^\n]*\}\s*\n\s*\{', head) else PARSERS['.json']
+    return PARSERS['.csv']
+
+def parse_statement(path, filename=None, executor=None, chunk_rows=DEFAULT_CHUNK_ROWS, parallel_min_bytes=0):
+    """Yields the transactions in a statement file of any supported format, in file order.
+
+    Files of at least ``parallel_min_bytes`` are parsed in chunks on ``executor``
+    (a process pool) when one is given.
+    """
+    if executor is not None and os.path.getsize(path) < parallel_min_bytes:
+        executor = None
+    return detect_parser(path, filename)(path, executor=executor, chunk_rows=chunk_rows)
@@ -0,0 +1,145 @@
+# app/plans.py
+
+import logging
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+from . import db
+from .models import SavingsPlan, Transaction
+from .signals import transactions_inserted
+
+def project_completion(goal_amount, current_amount, starting_amount, start_date, today=None, reached_on=None):
+    """Projects the completion date from the average daily progress since the plan started.
+
+    For a plan that has reached its goal, returns ``reached_on``, the day it
+    got there (today if unknown). Returns None when the plan has made no
+    progress yet. This is the date stored in ``SavingsPlan.projected_date``
+    and shown on the trends page.
+    """
+    today = today or date.today()
+    goal = float(goal_amount or 0)
+    current = float(current_amount or 0)
+    if current >= goal:
+        return reached_on or today
+    days = (today - start_date).days if start_date else 0
+    progress = current - float(starting_amount or 0)
+    if days <= 0 or progress <= 0:
+        return None
+    return today + timedelta(days=round((goal - current) / (progress / days)))
+
+def goal_reached_on(account_id, start_date, amount_needed):
+    """Returns the first day the account's net flow since ``start_date`` added up to ``amount_needed``."""
+    if amount_needed <= 0:
+        return start_date
+    query = select(
+        Transaction.date,
+        func.sum(Transaction.amount).over(order_by=(Transaction.date, Transaction.id)).label('progress'),
+    ).where(Transaction.account_id == account_id)
+    if start_date:
+        query = query.where(Transaction.date >= datetime.combine(start_date, time.min))
+    running = query.subquery()
+    reached = db.session.execute(
+        # Half a cent of slack for sums of NUMERIC columns stored as floats (SQLite).
+        select(running.c.date).where(running.c.progress >= amount_needed - 0.005)
+        .order_by(running.c.date).limit(1)
+    ).scalar()
+    return reached.date() if reached else None
+
+def _save_progress(plan_id, delta=None, current_amount=None):
+    """Adds ``delta`` to (or sets) a plan's current amount and refreshes its projected date.
+
+    Once a plan reaches its goal, its projected date becomes the day it did
+    and stays there on later imports instead of moving to each import's date.
+    """
+    if delta is not None:
+        new_amount = func.coalesce(SavingsPlan.current_amount, 0) + delta
+    else:
+        new_amount = current_amount
+    goal, current, starting, start_date, projected, account_id = db.session.execute(
+        update(SavingsPlan)
+        .where(SavingsPlan.id == plan_id)
+        .values(current_amount=new_amount)
+        .returning(SavingsPlan.goal_amount, SavingsPlan.current_amount, SavingsPlan.starting_amount,
+                   SavingsPlan.start_date, SavingsPlan.projected_date, SavingsPlan.account_id)
+    ).one()
+    reached_on = None
+    if float(current or 0) >= float(goal or 0):
+        already_reached = delta is not None and float(current or 0) - delta >= float(goal or 0)
+        if already_reached and projected is not None:
+            reached_on = projected
+        else:
+            reached_on = goal_reached_on(account_id, start_date, float(goal or 0) - float(starting or 0))
+    db.session.execute(
+        update(SavingsPlan)
+        .where(SavingsPlan.id == plan_id)
+        .values(projected_date=project_completion(goal, current, starting, start_date, reached_on=reached_on))
+    )
+
+def apply_transactions(account_id, rows):
+    """Adds a batch of inserted rows to the progress of the account's savings plans.
+
+    Only the batch is read: rows are sorted by date once and each plan takes
+    the suffix sum from its start date.
+    """
+    plans = db.session.execute(
+        select(SavingsPlan.id, SavingsPlan.start_date).where(SavingsPlan.account_id == account_id)
+    ).all()
+    if not plans or not rows:
+        return
+    ordered = sorted((row['date'], float(row['amount'])) for row in rows)
+    dates = [d for d, _ in ordered]
+    suffix = [0.0] * (len(ordered) + 1)
+    for i in range(len(ordered) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + ordered[i][1]
+
+    for plan_id, start_date in plans:
+        start = datetime.combine(start_date or date.min, time.min)
+        delta = suffix[bisect_left(dates, start)]
+        if delta:
+            _save_progress(plan_id, delta=delta)
+
+@transactions_inserted.connect
+def _on_transactions_inserted(sender, account_id, rows):
+    apply_transactions(account_id, rows)
+
+def recompute_account_plans(account_id):
+    """Recomputes every plan of an account from its transaction history."""
+    plans = SavingsPlan.query.filter_by(account_id=account_id).all()
+    for plan in plans:
+        query = db.session.query(func.coalesce(func.sum(Transaction.amount), 0))\
+            .filter(Transaction.account_id == account_id)
+        if plan.start_date:
+            query = query.filter(Transaction.date >= datetime.combine(plan.start_date, time.min))
+        net_flow = float(query.scalar())
+        _save_progress(plan.id, current_amount=float(plan.starting_amount or 0) + net_flow)
+    db.session.commit()
+    return len(plans)
+
+def recompute_all_plans(workers=4):
+    """Recomputes plans for every account that has one, one account per worker thread."""
+    app = current_app._get_current_object()
+    account_ids = [row[0] for row in db.session.query(SavingsPlan.account_id).distinct()]
+
+    def run(account_id):
+        with app.app_context():
+            try:
+                return recompute_account_plans(account_id)
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(run, account_ids))
+    logging.info(f"Recomputed {sum(counts)} savings plans for {len(account_ids)} accounts")
+    return len(account_ids), sum(counts)
+
+@click.command('recompute-plans')
+@with_appcontext
+@click.option('--workers', default=4, show_default=True, help='Accounts to recompute in parallel.')
+def recompute_plans_command(workers):
+    """Recompute savings plan progress for all accounts from scratch."""
+    accounts, plans = recompute_all_plans(workers)
+    click.echo(f'Recomputed {plans} savings plans for {accounts} accounts.')
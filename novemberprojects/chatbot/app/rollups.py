@@ -0,0 +1,132 @@
+# app/rollups.py
+
+from collections import defaultdict
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, select, delete
+from . import db
+from .database import upsert_insert
+from .models import Transaction, CategoryTotal
+from .signals import transactions_inserted
+
+rollups_cli = AppGroup('rollups', help='Maintain the per-category spending rollup table.')
+
+def _month(column):
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+def apply_transactions(account_id, rows):
+    """Adds a batch of newly inserted transaction rows to the account's CategoryTotal rollup.
+
+    Runs in the caller's transaction so the rollup commits together with the rows.
+    """
+    deltas = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        key = (row['category'] or '', row['date'].strftime('%Y-%m'))
+        deltas[key][0] += float(row['amount'])
+        deltas[key][1] += 1
+    if not deltas:
+        return
+
+    stmt = upsert_insert(CategoryTotal)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['account_id', 'category', 'month'],
+        set_={
+            'total': CategoryTotal.total + stmt.excluded.total,
+            'count': CategoryTotal.count + stmt.excluded.count,
+        },
+    )
+    db.session.execute(stmt, [
+        {'account_id': account_id, 'category': category, 'month': month, 'total': total, 'count': count}
+        for (category, month), (total, count) in deltas.items()
+    ])
+
+@transactions_inserted.connect
+def _on_transactions_inserted(sender, account_id, rows):
+    apply_transactions(account_id, rows)
+
+def category_totals(account_id):
+    """Returns (category, total) rows for an account from the precomputed rollup."""
+    return db.session.query(
+        CategoryTotal.category,
+        func.sum(CategoryTotal.total).label('total')
+    ).filter_by(account_id=account_id).group_by(CategoryTotal.category).all()
+
+def transaction_fingerprint(account_id):
+    """Returns a cheap (count, total) pair that changes whenever transactions are added to the account.
+
+    Both values come from the rollup, so this never scans the account's history.
+    """
+    count, total = db.session.query(
+        func.coalesce(func.sum(CategoryTotal.count), 0),
+        func.coalesce(func.sum(CategoryTotal.total), 0),
+    ).filter_by(account_id=account_id).one()
+    return int(count), round(float(total), 2)
+
+def _aggregate_query(account_id=None):
+    month = _month(Transaction.date)
+    query = select(
+        Transaction.account_id,
+        func.coalesce(Transaction.category, '').label('category'),
+        month.label('month'),
+        func.sum(Transaction.amount).label('total'),
+        func.count().label('count'),
+    ).group_by(Transaction.account_id, func.coalesce(Transaction.category, ''), month)
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    return query
+
+def rebuild_category_totals(account_id=None):
+    """Recomputes the rollup from the transaction table, for one account or all of them."""
+    clear = delete(CategoryTotal)
+    if account_id is not None:
+        clear = clear.where(CategoryTotal.account_id == account_id)
+    db.session.execute(clear)
+    aggregate = _aggregate_query(account_id)
+    db.session.execute(
+        CategoryTotal.__table__.insert().from_select(
+            ['account_id', 'category', 'month', 'total', 'count'], aggregate
+        )
+    )
+    db.session.commit()
+
+def check_category_totals(account_id=None):
+    """Compares the rollup with a fresh aggregate and returns the mismatching keys."""
+    expected = {
+        (r.account_id, r.category, r.month): (round(float(r.total or 0), 2), r.count)
+        for r in db.session.execute(_aggregate_query(account_id))
+    }
+    stored_query = select(
+        CategoryTotal.account_id, CategoryTotal.category, CategoryTotal.month,
+        CategoryTotal.total, CategoryTotal.count,
+    )
+    if account_id is not None:
+        stored_query = stored_query.where(CategoryTotal.account_id == account_id)
+    stored = {
+        (r.account_id, r.category, r.month): (round(float(r.total or 0), 2), r.count)
+        for r in db.session.execute(stored_query)
+        if r.count
+    }
+    return sorted(
+        key for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    )
+
+@rollups_cli.command('check')
+@click.option('--account', 'account_id', type=int, help='Only check this account.')
+def check_command(account_id):
+    """Report rollup rows that disagree with the transaction table."""
+    mismatches = check_category_totals(account_id)
+    for key in mismatches:
+        click.echo(f'Mismatch: account={key[0]} category={key[1]!r} month={key[2]}')
+    if mismatches:
+        raise SystemExit(f'{len(mismatches)} rollup rows are out of date. Run "flask rollups rebuild".')
+    click.echo('Category totals are consistent.')
+
+@rollups_cli.command('rebuild')
+@click.option('--account', 'account_id', type=int, help='Only rebuild this account.')
+def rebuild_command(account_id):
+    """Recompute the rollup table from scratch."""
+    rebuild_category_totals(account_id)
+    click.echo('Category totals rebuilt.')
@@ -1,15 +1,26 @@
 # app/routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import (Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, abort,
+                   Response, stream_with_context, current_app)
 from flask_login import current_user, login_user, logout_user, login_required
 from . import db
-from .models import User, Account, Transaction, SavingsPlan
+from .models import User, Account, Transaction, SavingsPlan, ImportJob, identity_cache
 from .forms import RegistrationForm, LoginForm, ChatbotForm, UploadForm
-from .ai_utils import get_financial_advice, get_financial_advice_chat
-from sqlalchemy import func
-import csv
-import io
-from datetime import datetime
+from .ai_utils import (get_financial_advice, get_financial_advice_chat, build_chat_messages,
+                       stream_financial_advice_chat, CHAT_ERROR_MESSAGE)
+from .jobs import import_queue
+from .rollups import category_totals
+from .balances import balance_on, balance_history
+from .dashboard import dashboard_snapshot, dashboard_validators
+from .http_cache import conditional_response
+from .advice_cache import advice_cache
+from .analytics import account_analytics
+from .pagination import transactions_page, TRANSACTION_FIELDS
+from .conversations import get_conversation, add_message, delete_conversation, history_window
+import json
+import logging
+import openai
+from datetime import datetime, timedelta
 
 main_bp = Blueprint('main', __name__)
 
@@ -52,6 +63,8 @@ def login():
 
 @main_bp.route('/logout')
 def logout():
+    if current_user.is_authenticated:
+        identity_cache.invalidate(current_user.id)
     logout_user()
     return redirect(url_for('main.index'))
 
@@ -59,58 +72,107 @@ def logout():
 @login_required
 def dashboard():
     account = current_user.account
-    transactions = Transaction.query.filter_by(account_id=account.id)\
-                        .order_by(Transaction.date.desc())\
-                        .limit(5).all()
-    return render_template('dashboard.html', title='Dashboard', account=account, transactions=transactions)
+    snapshot = dashboard_snapshot(account.id)
+    jobs = ImportJob.query.filter_by(account_id=account.id)\
+                .order_by(ImportJob.created_at.desc())\
+                .limit(5).all()
+    etag, last_modified = dashboard_validators(current_user, snapshot, jobs)
+    return conditional_response(etag, last_modified, lambda: render_template(
+        'dashboard.html', title='Dashboard', balance=snapshot.balance, transactions=snapshot.transactions,
+        jobs=jobs, spending=snapshot.spending))
 
 @main_bp.route('/analysis')
 @login_required
 def analysis():
     account = current_user.account
-    transactions = Transaction.query.filter_by(account_id=account.id).all()
-    advice = get_financial_advice(transactions)
+    advice = get_financial_advice(account)
     return render_template('analysis.html', title='Financial Analysis', advice=advice)
 
+@main_bp.route('/analysis/cache_stats')
+@login_required
+def advice_cache_stats():
+    return jsonify(advice_cache.stats())
+
 @main_bp.route('/spending_summary')
 @login_required
 def spending_summary():
     account = current_user.account
-    spending = db.session.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('total')
-    ).filter_by(account_id=account.id).group_by(Transaction.category).all()
+    spending = category_totals(account.id)
     return render_template('spending_summary.html', title='Spending Summary', spending=spending)
 
+@main_bp.route('/trends')
+@login_required
+def trends():
+    account = current_user.account
+    analytics = account_analytics(account.id)
+    balances = balance_history(account.id)
+    return render_template('trends.html', title='Spending Trends', balances=balances, **analytics)
+
 @main_bp.route('/chatbot', methods=['GET', 'POST'])
 @login_required
 def chatbot():
     form = ChatbotForm()
-    if 'messages' not in session:
-        session['messages'] = []
+    conversation = get_conversation()
 
     if form.validate_on_submit():
-        user_input = form.user_input.data
+        conversation = get_conversation(create=True)
         # Add user's message to the conversation history
-        session['messages'].append({'role': 'user', 'content': user_input})
+        add_message(conversation, 'user', form.user_input.data)
 
-        # Get the chatbot's response
-        response = get_financial_advice_chat(session['messages'])
+        # Get the chatbot's response from the recent part of the conversation
+        response = get_financial_advice_chat(history_window(conversation))
 
         # Add chatbot's response to the conversation history
-        session['messages'].append({'role': 'assistant', 'content': response})
+        add_message(conversation, 'assistant', response)
+        return redirect(url_for('main.chatbot'))
+
+    messages = conversation.messages.all() if conversation else []
+    return render_template('chatbot.html', title='Financial Planner Chatbot', form=form, messages=messages)
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@main_bp.route('/chatbot/stream', methods=['POST'])
+@login_required
+def chatbot_stream():
+    """Streams the chatbot's reply to the browser as Server-Sent Events.
+
+    The user's message is stored before streaming starts and the finished
+    reply is stored once the stream completes.
+    """
+    form = ChatbotForm()
+    if not form.validate_on_submit():
+        return jsonify(errors=form.errors), 400
 
-        # Save the session
-        session.modified = True
+    conversation = get_conversation(create=True)
+    add_message(conversation, 'user', form.user_input.data)
+    messages = build_chat_messages(history_window(conversation))
 
-        return render_template('chatbot.html', title='Financial Planner Chatbot', form=form, messages=session['messages'])
+    def generate():
+        parts = []
+        try:
+            for token in stream_financial_advice_chat(messages):
+                parts.append(token)
+                yield _sse('token', {'token': token})
+        except (openai.OpenAIError, EnvironmentError) as e:
+            logging.error(f"OpenAI API error: {e}")
+            yield _sse('error', {'message': CHAT_ERROR_MESSAGE})
+            return
+        add_message(conversation, 'assistant', ''.join(parts).strip())
+        yield _sse('done', {})
 
-    return render_template('chatbot.html', title='Financial Planner Chatbot', form=form, messages=session.get('messages'))
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @main_bp.route('/reset_chat')
 @login_required
 def reset_chat():
-    session.pop('messages', None)
+    conversation = get_conversation()
+    if conversation is not None:
+        delete_conversation(conversation)
+    session.pop('conversation_id', None)
     return redirect(url_for('main.chatbot'))
 
 @main_bp.route('/upload_transactions', methods=['GET', 'POST'])
@@ -118,30 +180,78 @@ def reset_chat():
 def upload_transactions():
     form = UploadForm()
     if form.validate_on_submit():
-        file = form.file.data
-        if file:
-            try:
-                stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-                csv_input = csv.reader(stream)
-                # Skip header row if it exists
-                header = next(csv_input, None)
-                account = current_user.account
-                for row in csv_input:
-                    date_str, amount_str, category, description = row
-                    # Parse date string to datetime object
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')  # Adjust format if necessary
-                    transaction = Transaction(
-                        date=date_obj,
-                        amount=float(amount_str),
-                        category=category,
-                        description=description,
-                        account_id=account.id
-                    )
-                    db.session.add(transaction)
-                db.session.commit()
-                flash('Transactions uploaded successfully.')
-                return redirect(url_for('main.dashboard'))
-            except Exception as e:
-                flash(f'An error occurred while processing the file: {e}')
-                return redirect(url_for('main.upload_transactions'))
+        jobs = [import_queue.submit(file, current_user.account.id) for file in form.file.data if file]
+        if jobs:
+            flash(f"Import of {', '.join(job.filename for job in jobs)} started. Progress is shown below.")
+            return redirect(url_for('main.dashboard'))
     return render_template('upload_transactions.html', title='Upload Transactions', form=form)
+
+@main_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.account_id != current_user.account.id:
+        abort(404)
+    return jsonify(job.to_dict())
+
+@main_bp.route('/api/transactions')
+@login_required
+def api_transactions():
+    """Pages through the account's transactions as JSON, newest first.
+
+    Query parameters: ``limit``, ``cursor`` (the ``next_cursor`` of the previous
+    page), ``category``, ``start`` and ``end`` (inclusive YYYY-MM-DD dates) and
+    ``fields`` (comma-separated subset of id, date, amount, category, description).
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', current_app.config['API_PAGE_SIZE']))
+        if not 1 <= limit <= current_app.config['API_MAX_PAGE_SIZE']:
+            raise ValueError(f"limit must be between 1 and {current_app.config['API_MAX_PAGE_SIZE']}")
+        fields = args['fields'].split(',') if args.get('fields') else None
+        unknown = set(fields or []) - set(TRANSACTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        start = datetime.strptime(args['start'], '%Y-%m-%d') if args.get('start') else None
+        end = datetime.strptime(args['end'], '%Y-%m-%d') + timedelta(days=1) if args.get('end') else None
+        rows, next_cursor = transactions_page(
+            current_user.account.id, limit,
+            cursor=args.get('cursor'), fields=fields,
+            category=args.get('category'), start=start, end=end,
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    for row in rows:
+        if row.get('date') is not None:
+            row['date'] = row['date'].isoformat()
+        if row.get('amount') is not None:
+            row['amount'] = float(row['amount'])
+    return jsonify(transactions=rows, next_cursor=next_cursor)
+
+@main_bp.route('/api/balance')
+@login_required
+def api_balance():
+    """Returns the account's closing balance on ``date`` (YYYY-MM-DD, default today)."""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') \
+            else datetime.utcnow().date()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(date=day.isoformat(), balance=float(balance_on(current_user.account.id, day)))
+
+@main_bp.route('/api/balance/history')
+@login_required
+def api_balance_history():
+    """Returns the closing balance of each day with transactions, oldest first.
+
+    Query parameters: ``start`` and ``end`` (inclusive YYYY-MM-DD dates).
+    """
+    args = request.args
+    try:
+        start = datetime.strptime(args['start'], '%Y-%m-%d').date() if args.get('start') else None
+        end = datetime.strptime(args['end'], '%Y-%m-%d').date() if args.get('end') else None
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    rows = balance_history(current_user.account.id, start=start, end=end)
+    return jsonify(balances=[{'date': day.isoformat(), 'balance': float(balance)} for day, balance in rows])
@@ -0,0 +1,10 @@
+# app/signals.py
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent after a batch of transactions is inserted for an account, inside the
+# same database transaction, with ``account_id`` and ``rows`` (the inserted
+# row dicts). Receivers update derived data so it commits with the rows.
+transactions_inserted = _signals.signal('transactions-inserted')
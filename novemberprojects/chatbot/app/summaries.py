@@ -0,0 +1,143 @@
+# app/summaries.py
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select, cast, type_coerce, Float, String
+from . import db
+from .models import Transaction
+from .rollups import transaction_fingerprint
+from .caching import FingerprintCache
+
+_cache = FingerprintCache()
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def load_transactions_frame(account_id):
+    """Loads an account's transactions into a DataFrame with a single query.
+
+    Dates are fetched as raw values and parsed in one vectorized step rather
+    than row by row by SQLAlchemy.
+    """
+    query = select(
+        type_coerce(Transaction.date, String).label('date'),
+        cast(Transaction.amount, Float).label('amount'),
+        Transaction.category,
+        Transaction.description,
+    ).where(Transaction.account_id == account_id)
+    df = pd.read_sql(query, db.session.connection())
+    df['date'] = pd.to_datetime(df['date'], format='mixed')
+    df['amount'] = df['amount'].astype('float64')
+    df['category'] = df['category'].fillna('Uncategorized')
+    df['description'] = df['description'].fillna('')
+    return df
+
+def _money(value):
+    return f"${value:,.2f}"
+
+def _sections(df, months, top_n, recent_n):
+    """Builds the summary sections in priority order, each as a list of lines."""
+    spending = df[df['amount'] < 0]
+    income = df[df['amount'] > 0]
+    overview = [
+        f"{len(df)} transactions from {df['date'].min().date()} to {df['date'].max().date()}.",
+        f"Total income {_money(income['amount'].sum())}, total spending {_money(-spending['amount'].sum())}.",
+    ]
+
+    # Per-category monthly totals for the most recent months.
+    month = df['date'].dt.to_period('M')
+    recent_months = month.drop_duplicates().sort_values().iloc[-months:]
+    pivot = (
+        df[month.isin(recent_months)]
+        .pivot_table(index='category', columns=month.rename('month'), values='amount', aggfunc='sum', fill_value=0.0)
+    )
+    pivot = pivot.reindex(pivot.abs().sum(axis=1).sort_values(ascending=False).index)
+    monthly = ["Category | " + " | ".join(str(m) for m in pivot.columns)]
+    monthly += [
+        f"{category} | " + " | ".join(_money(v) for v in row)
+        for category, row in zip(pivot.index, pivot.to_numpy())
+    ]
+
+    # Merchants the user spends the most with.
+    merchants = (
+        spending.groupby('description')['amount']
+        .agg(['sum', 'count'])
+        .sort_values('sum')
+        .head(top_n)
+    )
+    top_merchants = [
+        f"{name or '(no description)'}: {_money(-total)} over {count} transactions"
+        for name, total, count in zip(merchants.index, merchants['sum'], merchants['count'])
+    ]
+
+    # Transactions far from their category's usual amount.
+    grouped = df.groupby('category')['amount']
+    std = grouped.transform('std').replace(0, np.nan)
+    zscore = ((df['amount'] - grouped.transform('mean')) / std).abs()
+    outliers = df.assign(z=zscore)[zscore > 3].sort_values('z', ascending=False).head(top_n)
+    outlier_lines = [
+        f"{d.date()} - {c} - {_money(a)} - {desc}"
+        for d, c, a, desc in zip(outliers['date'], outliers['category'], outliers['amount'], outliers['description'])
+    ]
+
+    recent = df.nlargest(recent_n, 'date')
+    recent_lines = [
+        f"{d.date()} - {c} - {_money(a)} - {desc}"
+        for d, c, a, desc in zip(recent['date'], recent['category'], recent['amount'], recent['description'])
+    ]
+
+    return [
+        ('Overview', overview),
+        ('Monthly totals by category (negative is spending)', monthly),
+        ('Top merchants by spending', top_merchants),
+        ('Unusual transactions', outlier_lines),
+        ('Most recent transactions', recent_lines),
+    ]
+
+def _fit_to_budget(sections, token_budget):
+    """Adds sections, then lines within a section, until the token budget is used up."""
+    parts = []
+    used = 0
+    for title, lines in sections:
+        if not lines:
+            continue
+        header = f"{title}:"
+        cost = estimate_tokens(header)
+        if used + cost >= token_budget:
+            break
+        parts.append(header)
+        used += cost
+        for line in lines:
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                return "\n".join(parts)
+            parts.append(line)
+            used += cost
+        parts.append("")
+    return "\n".join(parts).strip()
+
+def summarize_transactions(account_id, token_budget=None):
+    """Returns a transaction history summary for prompts that fits in ``token_budget`` tokens.
+
+    Results are cached per account until its transactions change.
+    """
+    config = current_app.config
+    token_budget = token_budget or config['PROMPT_TOKEN_BUDGET']
+    _cache.max_entries = config['SUMMARY_CACHE_SIZE']
+    key = (account_id, transaction_fingerprint(account_id), token_budget)
+    summary = _cache.get(key)
+    if summary is not None:
+        return summary
+
+    df = load_transactions_frame(account_id)
+    if df.empty:
+        summary = "No transactions recorded yet."
+    else:
+        summary = _fit_to_budget(
+            _sections(df, months=config['SUMMARY_MONTHS'], top_n=10, recent_n=20),
+            token_budget,
+        )
+    _cache.set(key, summary)
+    return summary
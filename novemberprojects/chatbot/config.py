@@ -6,6 +6,54 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_secret_key_here'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
+    SQLALCHEMY_DATABASE_URI = (os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'app.db'))\
+        .replace('postgres://', 'postgresql://', 1)
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE') or 10)
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW') or 10)
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT') or 30)
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') != '0'
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY') or 'your_openai_api_key_here'
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or 5000)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS') or 2)
+    IMPORT_PARSE_PROCESSES = int(os.environ.get('IMPORT_PARSE_PROCESSES') or os.cpu_count() or 1)
+    IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS') or 20000)
+    IMPORT_PARALLEL_MIN_BYTES = int(os.environ.get('IMPORT_PARALLEL_MIN_BYTES') or 8 * 1024 * 1024)
+    IMPORT_HEARTBEAT_SECONDS = int(os.environ.get('IMPORT_HEARTBEAT_SECONDS') or 30)
+    IMPORT_STALE_SECONDS = int(os.environ.get('IMPORT_STALE_SECONDS') or 120)
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(basedir, 'uploads')
+    PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET') or 1500)
+    SUMMARY_MONTHS = 6
+    SUMMARY_CACHE_SIZE = 256
+    ADVICE_CACHE_TTL = int(os.environ.get('ADVICE_CACHE_TTL') or 24 * 60 * 60)
+    ADVICE_CACHE_MAX_ENTRIES = int(os.environ.get('ADVICE_CACHE_MAX_ENTRIES') or 1000)
+    CHAT_HISTORY_WINDOW = int(os.environ.get('CHAT_HISTORY_WINDOW') or 12)
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET') or 1500)
+    OPENAI_API_BASE = os.environ.get('OPENAI_API_BASE') or 'https://api.openai.com/v1'
+    OPENAI_CONNECT_TIMEOUT = float(os.environ.get('OPENAI_CONNECT_TIMEOUT') or 5)
+    OPENAI_READ_TIMEOUT = float(os.environ.get('OPENAI_READ_TIMEOUT') or 60)
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES') or 3)
+    OPENAI_BACKOFF_BASE = 0.5
+    OPENAI_BACKOFF_CAP = 8.0
+    OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY') or 8)
+    OPENAI_POOL_SIZE = int(os.environ.get('OPENAI_POOL_SIZE') or 10)
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 500
+    ANALYTICS_WINDOW_MONTHS = 3
+    ANALYTICS_CACHE_SIZE = 128
+    DASHBOARD_CACHE_SIZE = 256
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE') or 365 * 24 * 60 * 60)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS') == '1'
+    PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS') or 500)
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(basedir, 'profiles')
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)
+    USER_CACHE_SIZE = 1024
+    CATEGORIZER_ENABLED = os.environ.get('CATEGORIZER_ENABLED', '1') != '0'
+    CATEGORIZER_DIR = os.environ.get('CATEGORIZER_DIR') or os.path.join(basedir, 'categorizers')
+    CATEGORIZER_MIN_ROWS = 50
+    CATEGORIZER_MAX_ROWS = 50000
+    CATEGORIZER_MIN_CONFIDENCE = float(os.environ.get('CATEGORIZER_MIN_CONFIDENCE') or 0.6)
+    CATEGORIZER_RETRAIN_GROWTH = 0.1
@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND') or f"0.0.0.0:{os.environ.get('PORT') or 8000}"
+
+# Requests mostly wait on the database or OpenAI, so each worker process runs
+# a pool of threads. Chat replies stream over SSE and hold a thread for the
+# whole reply, so keep threads well above the expected concurrent chats.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY') or min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = int(os.environ.get('GUNICORN_THREADS') or 8)
+
+# OpenAI replies can take a while; don't let the arbiter kill a busy worker.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 120)
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory from in-process caches. An
+# import still running in a recycled worker is marked interrupted by the
+# import queue's heartbeat check (app/jobs.py).
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 2000)
+max_requests_jitter = 200
+
+# Each worker builds its own app, engine pool and import queue after the fork,
+# so database connections and threads are never shared between processes.
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
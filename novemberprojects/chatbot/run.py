@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
-
+# Only build the app when run as a script. The import queue's parse workers
+# use the spawn start method, which re-imports __main__ in every worker, and
+# `flask --app run` finds create_app by itself.
 if __name__ == '__main__':
+    app = create_app()
     app.run(debug=True)
@@ -0,0 +1,70 @@
+# scripts/bench_import.py
+"""Times importing a statement into a throwaway SQLite database, then
+re-importing it (every row a duplicate) and importing an overlapping one.
+
+    python scripts/bench_import.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from bench_queries import CATEGORIES
+
+def statement(rows, seed, start=0):
+    """Yields the same pseudo-random rows for the same seed, skipping the first ``start``."""
+    rng = random.Random(seed)
+    first = datetime(2015, 1, 1)
+    for i in range(rows):
+        row = {
+            'date': first + timedelta(days=rng.randrange(3650)),
+            'amount': round(rng.uniform(-500, 500), 2),
+            'category': rng.choice(CATEGORIES),
+            'description': f'Merchant {rng.randrange(500)}',
+        }
+        if i >= start:
+            yield row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='Rows per statement (default 200,000).')
+    parser.add_argument('--batch-size', type=int, default=Config.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+    Config.UPLOAD_FOLDER = os.path.join(tmp, 'uploads')
+
+    from app import create_app, db
+    from app.importer import import_transactions
+    from app.models import Account
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Account(id=1))
+        db.session.commit()
+
+        half = args.rows // 2
+        runs = [
+            ('first import', statement(args.rows, seed=1)),
+            ('same statement again', statement(args.rows, seed=1)),
+            # The second half of the first statement followed by new rows.
+            ('overlapping statement', (row for part in (statement(args.rows, seed=1, start=half),
+                                                       statement(half, seed=2)) for row in part)),
+        ]
+        print(f'{"run":<24} {"imported":>10} {"skipped":>10} {"seconds":>9} {"rows/s":>10}')
+        for name, rows in runs:
+            start = time.perf_counter()
+            imported, skipped = import_transactions(rows, 1, batch_size=args.batch_size)
+            elapsed = time.perf_counter() - start
+            print(f'{name:<24} {imported:>10,} {skipped:>10,} {elapsed:>9.2f} {(imported + skipped) / elapsed:>10,.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# scripts/bench_login.py
+"""Counts SQL queries and time per request for logged-in pages.
+
+Runs the same requests with the old user loader (``User.query.get`` and a
+lazy ``current_user.account``), with the joined-load loader and the identity
+cache disabled, and with the identity cache on.
+
+    python scripts/bench_login.py --requests 200 --rows 20000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+ROUTES = ['/dashboard', '/spending_summary', '/api/transactions?limit=20', '/jobs/1']
+
+def make_csv(rows):
+    lines = ['Date,Amount,Category,Description']
+    for _ in range(rows):
+        lines.append(f'2023-{random.randint(1, 12):02d}-{random.randint(1, 28):02d},'
+                     f'{random.uniform(-200, 200):.2f},{random.choice(["Food", "Rent", "Travel"])},Shop')
+    return ('\n'.join(lines) + '\n').encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route and mode.')
+    parser.add_argument('--rows', type=int, default=5000, help='Transactions to import first.')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+    Config.UPLOAD_FOLDER = os.path.join(tmp, 'uploads')
+    Config.WTF_CSRF_ENABLED = False
+
+    from sqlalchemy import event
+    from app import create_app, db, login
+    from app.models import User, identity_cache, load_user
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+
+    queries = 0
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    client = app.test_client()
+    client.post('/register', data={'username': 'bench', 'password': 'pw', 'password2': 'pw'})
+    client.post('/upload_transactions', data={'file': (io.BytesIO(make_csv(args.rows)), 'bench.csv')},
+                content_type='multipart/form-data')
+    while client.get('/jobs/1').json['status'] in ('queued', 'running'):
+        time.sleep(0.1)
+
+    def old_loader(user_id):
+        return User.query.get(int(user_id))
+
+    modes = [
+        ('User.query.get (before)', old_loader, 0),
+        ('joinedload, no cache', load_user, 0),
+        ('joinedload + identity cache', load_user, Config.USER_CACHE_TTL or 30),
+    ]
+    print(f'{"mode":<30} {"route":<28} {"queries/req":>11} {"ms/req":>8}')
+    for name, loader, ttl in modes:
+        login.user_loader(loader)
+        app.config['USER_CACHE_TTL'] = ttl
+        identity_cache.clear()
+        for route in ROUTES:
+            client.get(route)
+            queries = 0
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.get(route)
+            elapsed = time.perf_counter() - start
+            print(f'{name:<30} {route:<28} {queries / args.requests:>11.2f} {elapsed / args.requests * 1000:>8.2f}')
+    login.user_loader(load_user)
+
+if __name__ == '__main__':
+    main()
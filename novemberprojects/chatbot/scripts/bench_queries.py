@@ -0,0 +1,133 @@
+# scripts/bench_queries.py
+"""Seeds a throwaway SQLite database and times the hot Transaction queries.
+
+Each query is run with only the original date index, i.e. with every index
+that leads with account_id dropped, and again with the schema's indexes:
+the composite (account_id, date) and (account_id, category) indexes and the
+unique (account_id, content_hash) index used to skip duplicate imports.
+Timings and EXPLAIN QUERY PLAN are printed for both.
+
+    python scripts/bench_queries.py --rows 2000000 --accounts 200
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+CATEGORIES = ['Food', 'Rent', 'Utilities', 'Travel', 'Salary', 'Shopping', 'Health', 'Entertainment']
+
+def route_queries(account_id):
+    """Builds the SQL each route runs, compiled from the same ORM queries."""
+    from sqlalchemy import func
+    from app import db
+    from app.models import Transaction
+
+    queries = {
+        'dashboard': Transaction.query.filter_by(account_id=account_id)
+            .order_by(Transaction.date.desc()).limit(5),
+        'analysis / chat': Transaction.query.filter_by(account_id=account_id),
+        'spending_summary (raw aggregate)': db.session.query(
+            Transaction.category, func.sum(Transaction.amount).label('total')
+        ).filter_by(account_id=account_id).group_by(Transaction.category),
+    }
+    return {
+        name: str(q.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        for name, q in queries.items()
+    }
+
+def seed(path, rows, accounts):
+    conn = sqlite3.connect(path)
+    start = datetime(2015, 1, 1)
+    conn.executemany('INSERT INTO account (id, balance) VALUES (?, 0)', [(i,) for i in range(1, accounts + 1)])
+    batch = []
+    for i in range(rows):
+        batch.append((
+            (start + timedelta(minutes=random.randrange(10 * 365 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S.000000'),
+            round(random.uniform(-500, 500), 2),
+            random.choice(CATEGORIES),
+            f'Merchant {random.randrange(500)}',
+            random.randrange(1, accounts + 1),
+        ))
+        if len(batch) == 50000:
+            conn.executemany('INSERT INTO "transaction" (date, amount, category, description, account_id) VALUES (?, ?, ?, ?, ?)', batch)
+            batch.clear()
+    if batch:
+        conn.executemany('INSERT INTO "transaction" (date, amount, category, description, account_id) VALUES (?, ?, ?, ?, ?)', batch)
+    conn.commit()
+    conn.close()
+
+def account_indexes(conn):
+    """Returns {name: DDL} for the indexes on "transaction" whose first column is account_id.
+
+    Any of them can serve the account_id filter, so all are dropped for the
+    baseline, not just the composite ones.
+    """
+    indexes = {}
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master "
+                                  "WHERE type = 'index' AND tbl_name = 'transaction' AND sql IS NOT NULL"):
+        columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')]
+        if columns[:1] == ['account_id']:
+            indexes[name] = sql
+    return indexes
+
+def measure(conn, sql, repeat):
+    plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings), plan
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Transactions to seed (default 1,000,000).')
+    parser.add_argument('--accounts', type=int, default=100, help='Accounts to spread them over (default 100).')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the best time is reported.')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print(f'Seeding {args.rows:,} transactions over {args.accounts} accounts into {path} ...')
+        start = time.perf_counter()
+        seed(path, args.rows, args.accounts)
+        print(f'Seeded in {time.perf_counter() - start:.1f}s\n')
+        queries = route_queries(account_id=1)
+
+    conn = sqlite3.connect(path)
+    indexes = account_indexes(conn)
+    print(f'Indexes leading with account_id: {", ".join(sorted(indexes))}\n')
+    for name in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.execute('ANALYZE')
+    before = {name: measure(conn, sql, args.repeat) for name, sql in queries.items()}
+
+    for ddl in indexes.values():
+        conn.execute(ddl)
+    conn.execute('ANALYZE')
+    after = {name: measure(conn, sql, args.repeat) for name, sql in queries.items()}
+    conn.close()
+
+    for name in queries:
+        (t0, plan0), (t1, plan1) = before[name], after[name]
+        print(f'== {name}')
+        print(f'   date index only:   {t0 * 1000:9.2f} ms  {" | ".join(plan0)}')
+        print(f'   account indexes:   {t1 * 1000:9.2f} ms  {" | ".join(plan1)}')
+        print(f'   speedup:           {t0 / t1 if t1 else float("inf"):9.1f}x\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# scripts/load_test.py
+"""Runs concurrent reads and writes against a throwaway SQLite database.
+
+Each process builds its own app, like a gunicorn worker, and runs a pool of
+threads that page through transactions and read spending totals, or import
+a small batch of transactions (with the rollup and savings plan updates that
+go with it). Throughput, latency and "database is locked" errors are reported
+for each process count.
+
+    python scripts/load_test.py --processes 1,2,4,8 --threads 4 --duration 10
+    python scripts/load_test.py --no-wal    # rollback journal, no busy timeout
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def run_worker(threads, duration, write_ratio, batch_rows, accounts, results):
+    import threading
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db
+    from app.importer import import_transactions, TransactionImportError
+    from app.pagination import transactions_page
+    from app.rollups import category_totals
+    from bench_queries import CATEGORIES
+
+    app = create_app()
+    stats = []
+    lock = threading.Lock()
+
+    def read(account_id):
+        transactions_page(account_id, 50)
+        category_totals(account_id)
+
+    def write(account_id):
+        start = datetime(2024, 1, 1)
+        rows = [{
+            'date': start + timedelta(minutes=random.randrange(365 * 24 * 60)),
+            'amount': round(random.uniform(-500, 500), 2),
+            'category': random.choice(CATEGORIES),
+            'description': f'Merchant {random.randrange(500)}',
+        } for _ in range(batch_rows)]
+        import_transactions(rows, account_id, batch_size=batch_rows)
+
+    def loop():
+        local = []
+        deadline = time.perf_counter() + duration
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                kind = 'write' if random.random() < write_ratio else 'read'
+                account_id = random.randrange(1, accounts + 1)
+                error = None
+                start = time.perf_counter()
+                try:
+                    (write if kind == 'write' else read)(account_id)
+                except (OperationalError, TransactionImportError) as e:
+                    db.session.rollback()
+                    error = 'locked' if 'locked' in str(e) else type(e).__name__
+                local.append((kind, time.perf_counter() - start, error))
+            db.session.remove()
+        with lock:
+            stats.extend(local)
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(stats)
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='Transactions to seed (default 200,000).')
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--processes', default='1,2,4', help='Comma-separated process counts to try.')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per process.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run.')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that import rows.')
+    parser.add_argument('--batch-rows', type=int, default=20, help='Rows per write.')
+    parser.add_argument('--no-wal', action='store_true',
+                        help='Use the rollback journal and no busy timeout, as before.')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'load.db')
+    # Worker processes are spawned fresh and read their settings from the environment.
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+    if args.no_wal:
+        os.environ['SQLITE_WAL'] = '0'
+        os.environ['SQLITE_BUSY_TIMEOUT'] = '0'
+
+    from app import create_app, db
+    from app.rollups import rebuild_category_totals
+    from bench_queries import seed
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print(f'Seeding {args.rows:,} transactions over {args.accounts} accounts into {path} ...')
+        seed(path, args.rows, args.accounts)
+        rebuild_category_totals()
+        journal = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.session.remove()
+        db.engine.dispose()
+    print(f'journal_mode={journal}, {args.threads} threads per process, '
+          f'{args.write_ratio:.0%} writes of {args.batch_rows} rows, {args.duration:.0f}s per run\n')
+
+    print(f'{"procs":>5} {"reads/s":>9} {"writes/s":>9} {"read p95 ms":>12} {"write p95 ms":>13} '
+          f'{"locked":>7} {"other errors":>13}')
+    ctx = multiprocessing.get_context('spawn')
+    for processes in [int(n) for n in args.processes.split(',')]:
+        results = ctx.Queue()
+        workers = [ctx.Process(target=run_worker, args=(
+            args.threads, args.duration, args.write_ratio, args.batch_rows, args.accounts, results,
+        )) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        stats = [row for _ in workers for row in results.get()]
+        for worker in workers:
+            worker.join()
+
+        ok = {kind: [t for k, t, error in stats if k == kind and error is None] for kind in ('read', 'write')}
+        locked = sum(1 for _, _, error in stats if error == 'locked')
+        other = sum(1 for _, _, error in stats if error not in (None, 'locked'))
+        print(f'{processes:>5} {len(ok["read"]) / args.duration:>9.0f} {len(ok["write"]) / args.duration:>9.1f} '
+              f'{percentile(ok["read"], 95) * 1000:>12.1f} {percentile(ok["write"], 95) * 1000:>13.1f} '
+              f'{locked:>7} {other:>13}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# scripts/openai_stub.py
+"""Local stand-in for the OpenAI chat completions API.
+
+Serve it and point the app at it:
+
+    python scripts/openai_stub.py --port 8001 --latency 0.5 --failure-rate 0.2
+    OPENAI_API_BASE=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub python run.py
+
+Or exercise the shared LLM client against it (sync, streaming and async,
+including retries on injected 429/500 responses) and exit:
+
+    python scripts/openai_stub.py --check --requests 50 --failure-rate 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from flask import Flask, Response, jsonify, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def create_stub(latency=0.0, failure_rate=0.0, token_delay=0.02):
+    stub = Flask(__name__)
+    stub.config['stats'] = {'requests': 0, 'failures': 0, 'in_flight': 0, 'max_in_flight': 0}
+    lock = threading.Lock()
+
+    def reply_text(messages):
+        question = messages[-1]['content'] if messages else ''
+        return f"Stub reply to: {question[:60]}"
+
+    @stub.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        stats = stub.config['stats']
+        with lock:
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                with lock:
+                    stats['failures'] += 1
+                status = random.choice([429, 500, 503])
+                return jsonify(error={'message': f'Injected {status}', 'type': 'stub_error'}), status
+
+            body = request.get_json()
+            text = reply_text(body.get('messages', []))
+            created = int(time.time())
+            if body.get('stream'):
+                def events():
+                    for word in text.split(' '):
+                        chunk = {'object': 'chat.completion.chunk', 'created': created, 'model': body['model'],
+                                 'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]}
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        time.sleep(token_delay)
+                    yield "data: [DONE]\n\n"
+                return Response(events(), mimetype='text/event-stream')
+
+            return jsonify({
+                'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': created, 'model': body['model'],
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+            })
+        finally:
+            with lock:
+                stats['in_flight'] -= 1
+
+    return stub
+
+def run_check(stub, port, n_requests, concurrency):
+    from concurrent.futures import ThreadPoolExecutor
+    from config import Config
+
+    os.environ.setdefault('OPENAI_API_KEY', 'stub')
+    Config.OPENAI_API_BASE = f'http://127.0.0.1:{port}/v1'
+    Config.OPENAI_MAX_CONCURRENCY = concurrency
+    Config.OPENAI_BACKOFF_BASE = 0.05
+    Config.OPENAI_MAX_RETRIES = 6
+    from app import create_app
+    from app.llm import llm_client
+    create_app()
+
+    messages = [{'role': 'user', 'content': 'How can I save more?'}]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency * 2) as pool:
+        replies = list(pool.map(lambda i: llm_client.chat(messages, model='stub'), range(n_requests)))
+    print(f"sync:   {len(replies)} replies in {time.perf_counter() - started:.2f}s")
+
+    streamed = ''.join(llm_client.stream_chat(messages, model='stub'))
+    print(f"stream: {streamed.strip()!r}")
+
+    async def many():
+        try:
+            return await asyncio.gather(*(llm_client.achat(messages, model='stub') for _ in range(n_requests)))
+        finally:
+            await llm_client.aclose()
+    started = time.perf_counter()
+    replies = asyncio.run(many())
+    print(f"async:  {len(replies)} replies in {time.perf_counter() - started:.2f}s")
+
+    stats = stub.config['stats']
+    print(f"stub:   {stats['requests']} requests, {stats['failures']} injected failures, "
+          f"max {stats['max_in_flight']} in flight (limit {concurrency})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with 429/500/503.')
+    parser.add_argument('--check', action='store_true', help='Run the LLM client against the stub and exit.')
+    parser.add_argument('--requests', type=int, default=20, help='Requests per mode with --check.')
+    parser.add_argument('--concurrency', type=int, default=4, help='OPENAI_MAX_CONCURRENCY with --check.')
+    args = parser.parse_args()
+
+    stub = create_stub(latency=args.latency, failure_rate=args.failure_rate)
+    if not args.check:
+        stub.run(port=args.port, threaded=True)
+        return
+
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', args.port, stub, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run_check(stub, args.port, args.requests, args.concurrency)
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Config reads the environment when it is imported, so point the app at a
+# scratch directory before any test imports it.
+_scratch = tempfile.mkdtemp(prefix='chatbot-tests-')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_scratch, 'test.db'))
+os.environ.setdefault('UPLOAD_FOLDER', os.path.join(_scratch, 'uploads'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(_scratch, 'profiles'))
+os.environ.setdefault('CATEGORIZER_DIR', os.path.join(_scratch, 'categorizers'))
+os.environ.setdefault('IMPORT_PARSE_PROCESSES', '0')
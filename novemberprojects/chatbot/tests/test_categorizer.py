@@ -0,0 +1,38 @@
+from datetime import datetime
+import pytest
+from config import Config
+from app import create_app, db
+from app.categorizer import labelled_count, train_categorizer
+from app.importer import import_transactions
+from app.models import Account, Transaction
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'categorizer.db'))
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Account(id=1))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def row(day, description, category):
+    return {'date': datetime(2024, 1, day), 'amount': -10.0, 'description': description, 'category': category}
+
+def test_only_empty_categories_are_filled_and_predictions_are_not_trained_on(app):
+    import_transactions([row(1, 'GROCER 1', 'groceries'), row(2, 'CINEMA 1', 'fun')], 1)
+    model = train_categorizer(1, min_rows=2)
+
+    def categorize(rows):
+        model.fill_missing(rows, min_confidence=0)
+
+    import_transactions([row(3, 'GROCER 3', 'Other'), row(4, 'GROCER 4', ''), row(5, 'CINEMA 3', 'fun')],
+                        1, categorize=categorize)
+
+    rows = {t.description: t for t in Transaction.query.all()}
+    assert (rows['GROCER 3'].category, rows['GROCER 3'].category_source) == ('Other', 'user')
+    assert (rows['GROCER 4'].category, rows['GROCER 4'].category_source) == ('groceries', 'model')
+    assert rows['CINEMA 3'].category_source == 'user'
+    assert labelled_count(1) == 4
@@ -0,0 +1,47 @@
+import os
+import threading
+import pytest
+from app import create_app
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app()
+    app.config.update(PROFILE_REQUESTS=True, PROFILE_SLOW_MS=0, PROFILE_DIR=str(tmp_path))
+    return app
+
+def test_concurrent_requests_are_profiled_one_at_a_time(app, tmp_path):
+    first_started = threading.Event()
+    second_done = threading.Event()
+
+    @app.route('/_test/first')
+    def first():
+        first_started.set()
+        # Stay inside the profiled request until the second one has finished.
+        assert second_done.wait(5)
+        return 'first'
+
+    @app.route('/_test/second')
+    def second():
+        return 'second'
+
+    responses = {}
+
+    def get(path):
+        responses[path] = app.test_client().get(path)
+
+    thread = threading.Thread(target=get, args=('/_test/first',))
+    thread.start()
+    assert first_started.wait(5)
+    get('/_test/second')
+    second_done.set()
+    thread.join(5)
+
+    assert responses['/_test/first'].status_code == 200
+    assert responses['/_test/second'].status_code == 200
+    profiles = os.listdir(tmp_path)
+    assert len(profiles) == 1
+    assert '-first-' in profiles[0]
+
+    # The lock is released once the profiled request ends.
+    app.test_client().get('/_test/second')
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import inspect, text
+from config import Config
+from app import create_app, db
+from app.migrations import MIGRATIONS, applied_migrations, upgrade
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'migrations.db'))
+    app = create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def recorded():
+    with db.engine.begin() as conn:
+        return applied_migrations(conn)
+
+def test_upgrade_stamps_a_database_created_with_create_all(app):
+    db.create_all()
+    assert upgrade() == [name for name, _ in MIGRATIONS]
+    assert recorded() == {name for name, _ in MIGRATIONS}
+    assert upgrade() == []
+
+def test_upgrade_replays_migrations_on_an_older_create_all_database(app):
+    # A database built from the models before the import job heartbeat was added.
+    db.create_all()
+    with db.engine.begin() as conn:
+        conn.execute(text('ALTER TABLE import_job DROP COLUMN heartbeat_at'))
+        conn.execute(text('ALTER TABLE import_job DROP COLUMN path'))
+        conn.execute(text("INSERT INTO savings_plan (goal_name, goal_amount, current_amount, start_date, "
+                          "starting_amount) VALUES ('Trip', 1000, 250, '2024-01-01', 100)"))
+
+    upgrade()
+
+    assert recorded() == {name for name, _ in MIGRATIONS}
+    columns = {c['name'] for c in inspect(db.engine).get_columns('import_job')}
+    assert {'heartbeat_at', 'path'} <= columns
+    with db.engine.begin() as conn:
+        plan = conn.execute(text('SELECT start_date, starting_amount FROM savings_plan')).one()
+    assert plan.start_date == '2024-01-01'
+    assert float(plan.starting_amount) == 100
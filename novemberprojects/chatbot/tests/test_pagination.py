@@ -0,0 +1,34 @@
+from datetime import datetime
+import pytest
+from config import Config
+from app import create_app, db
+from app.models import Account, Transaction
+from app.pagination import transactions_page
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'pagination.db'))
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Account(id=1))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def test_pages_continue_past_transactions_without_a_date(app):
+    dates = [None, datetime(2024, 1, 2), None, datetime(2024, 1, 3), datetime(2024, 1, 2)]
+    db.session.add_all(Transaction(account_id=1, date=date, amount=-1) for date in dates)
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = transactions_page(1, 2, cursor=cursor, fields=['id', 'date'])
+        seen += rows
+        if cursor is None:
+            break
+
+    assert [(row['id'], row['date']) for row in seen] == [
+        (4, datetime(2024, 1, 3)), (2, datetime(2024, 1, 2)), (5, datetime(2024, 1, 2)), (1, None), (3, None),
+    ]
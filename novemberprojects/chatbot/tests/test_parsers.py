@@ -0,0 +1,62 @@
+import pytest
+from app.parsers import StatementParseError, parse_amount, parse_statement, sniff_decimal_separator
+
+@pytest.mark.parametrize('text, expected', [
+    ('-1.234,56', -1234.56),
+    ('€ 1.234,00', 1234.0),
+    ('1.234,00', 1234.0),
+    ('1,234.56', 1234.56),
+    ('$1,234,567.89', 1234567.89),
+    ('(12.50)', -12.5),
+    ('12,50', 12.5),
+    ('0,125', 0.125),
+    ('-200', -200.0),
+])
+def test_parse_amount_reads_the_separator_from_the_value(text, expected):
+    assert parse_amount(text) == pytest.approx(expected)
+
+@pytest.mark.parametrize('text', ['1,234', '1.234', '-1.234'])
+def test_parse_amount_rejects_ambiguous_values(text):
+    with pytest.raises(ValueError, match='ambiguous'):
+        parse_amount(text)
+
+@pytest.mark.parametrize('text, decimal_separator, expected', [
+    ('1.234', ',', 1234.0),
+    ('1.234', '.', 1.234),
+    ('1,234', '.', 1234.0),
+    ('1,234', ',', 1.234),
+])
+def test_parse_amount_uses_the_file_convention(text, decimal_separator, expected):
+    assert parse_amount(text, decimal_separator) == pytest.approx(expected)
+
+@pytest.mark.parametrize('text, decimal_separator', [
+    ('12,50', '.'),
+    ('1.23.4,5', ','),
+    ('1,234.56', ','),
+    ('abc', '.'),
+])
+def test_parse_amount_rejects_values_that_break_the_convention(text, decimal_separator):
+    with pytest.raises(ValueError, match='invalid'):
+        parse_amount(text, decimal_separator)
+
+def test_sniff_decimal_separator():
+    assert sniff_decimal_separator(['1.234', '-1.234,56', '12']) == ','
+    assert sniff_decimal_separator(['1,234', '1,234.56']) == '.'
+    assert sniff_decimal_separator(['1,234', '12']) is None
+    with pytest.raises(StatementParseError):
+        sniff_decimal_separator(['1.234,56', '1,234.56'])
+
+def test_csv_with_decimal_commas_applies_the_convention_to_every_row(tmp_path):
+    path = tmp_path / 'statement.csv'
+    # "1.500" alone could be 1.5, but the other rows show the file uses decimal commas.
+    path.write_text('Date;Amount;Description\n'
+                    '01.10.2023;-1.234,56;Rent\n'
+                    '02.10.2023;1.500;Salary\n'
+                    '03.10.2023;-12,5;Coffee\n', encoding='utf-8')
+    assert [row['amount'] for row in parse_statement(str(path))] == pytest.approx([-1234.56, 1500.0, -12.5])
+
+def test_csv_with_only_ambiguous_amounts_is_rejected(tmp_path):
+    path = tmp_path / 'statement.csv'
+    path.write_text('Date,Amount,Description\n2023-10-01,"1,234",Rent\n', encoding='utf-8')
+    with pytest.raises(StatementParseError, match='ambiguous'):
+        list(parse_statement(str(path)))
@@ -0,0 +1,10 @@
+# wsgi.py
+"""Production entry point for WSGI servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --threads 8 --port 8000 wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import socket
+import threading
+from datetime import datetime, timezone
+
+# Versioned model artifacts. Each training run writes a directory named
+# after its UTC time:
+#
+#   models/
+#     20241201T120000Z/
+#       metadata.json            version, dataset, scores, stopwords, ...
+#       tfidf_vectorizer.joblib
+#       logistic_regression.joblib, naive_bayes.joblib, ...
+#     LATEST                     name of the version to serve
+#     .serving/<host>-<pid>      version each running server has loaded
+#
+# Only json and os are imported up front: joblib, and the scikit-learn
+# modules the pickles need, are imported when an artifact is first loaded.
+
+LATEST = 'LATEST'
+METADATA = 'metadata.json'
+SERVING = '.serving'
+VECTORIZER = 'tfidf_vectorizer.joblib'
+
+def new_version():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def _write_text(path, text):
+    # Write then rename, so a running server never reads a half-written file.
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def save_artifacts(root, vectorizer, models, metadata, version=None, make_latest=True):
+    """Writes a new version directory under ``root`` and returns its version."""
+    import joblib
+    version = version or new_version()
+    final_dir = os.path.join(root, version)
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"Model version {version} already exists in {root}")
+    tmp_dir = os.path.join(root, f'.{version}.tmp')
+    os.makedirs(tmp_dir)
+    try:
+        joblib.dump(vectorizer, os.path.join(tmp_dir, VECTORIZER))
+        for name, model in models.items():
+            joblib.dump(model, os.path.join(tmp_dir, f'{name}.joblib'))
+        metadata = dict(metadata, version=version, models=sorted(models),
+                        created_at=datetime.now(timezone.utc).isoformat())
+        with open(os.path.join(tmp_dir, METADATA), 'w') as f:
+            json.dump(metadata, f, indent=2, sort_keys=True)
+        os.rename(tmp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if make_latest:
+        _write_text(os.path.join(root, LATEST), version + '\n')
+    return version
+
+def latest_version(root):
+    try:
+        with open(os.path.join(root, LATEST)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No trained model in {root}; run train.py first") from None
+
+def mark_serving(root, name, version):
+    """Records that the server ``name`` has ``version`` loaded, so it isn't pruned."""
+    os.makedirs(os.path.join(root, SERVING), exist_ok=True)
+    _write_text(os.path.join(root, SERVING, name), version + '\n')
+
+def unmark_serving(root, name):
+    try:
+        os.remove(os.path.join(root, SERVING, name))
+    except FileNotFoundError:
+        pass
+
+def _stale_marker(name):
+    # Markers are named <host>-<pid> (serve.server_name). One from this host
+    # whose process is gone belongs to a server that was killed. os.kill(pid, 0)
+    # only probes on POSIX; elsewhere, and for other hosts, markers are kept.
+    host, _, pid = name.rpartition('-')
+    if os.name != 'posix' or host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+def serving_versions(root):
+    """Returns the versions loaded by servers (see mark_serving), plus the one in LATEST.
+
+    Markers left by servers on this host that are no longer running are
+    removed and ignored.
+    """
+    versions = set()
+    try:
+        versions.add(latest_version(root))
+    except FileNotFoundError:
+        pass
+    directory = os.path.join(root, SERVING)
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        if name.endswith('.tmp'):
+            continue
+        if _stale_marker(name):
+            unmark_serving(root, name)
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                versions.add(f.read().strip())
+        except FileNotFoundError:
+            pass
+    return versions
+
+class ModelArtifacts:
+    """Loads one artifact version on demand and keeps what it loaded.
+
+    Nothing is read until it is used, so creating this object (and the app
+    that holds it) costs nothing; the vectorizer and each model are loaded by
+    the first request that needs them.
+    """
+
+    def __init__(self, root, version=None):
+        self.root = root
+        self.requested_version = version
+        self._metadata = None
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return os.path.join(self.root, self.version)
+
+    @property
+    def version(self):
+        return self.requested_version or self.metadata['version']
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            version = self.requested_version or latest_version(self.root)
+            with open(os.path.join(self.root, version, METADATA)) as f:
+                self._metadata = json.load(f)
+        return self._metadata
+
+    def _load(self, filename):
+        with self._lock:
+            if filename not in self._objects:
+                import joblib
+                self._objects[filename] = joblib.load(os.path.join(self.directory, filename))
+            return self._objects[filename]
+
+    @property
+    def vectorizer(self):
+        return self._load(VECTORIZER)
+
+    @property
+    def stop_words(self):
+        if 'stop_words' not in self._objects:
+            self._objects['stop_words'] = frozenset(self.metadata['stop_words'])
+        return self._objects['stop_words']
+
+    def model(self, name):
+        if name not in self.metadata['models']:
+            raise KeyError(f"Model {name!r} is not in version {self.version}; "
+                           f"available: {', '.join(self.metadata['models'])}")
+        return self._load(f'{name}.joblib')
@@ -0,0 +1,54 @@
+"""Measures /predict/batch throughput (messages per second) against batch size.
+
+Sends messages from spam.csv through the Flask test client, so the numbers
+include JSON parsing and preprocessing but not the network. Batch size 1 on
+the form-posted /predict is shown for comparison. Needs a model trained with
+train.py.
+
+    python benchmark_batch.py --sizes 1,10,100,1000,5000 --messages 20000
+"""
+
+import argparse
+import time
+import pandas as pd
+import serve
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,10,100,1000,5000', help='Comma-separated batch sizes.')
+    parser.add_argument('--messages', type=int, default=20000, help='Messages to classify per batch size.')
+    parser.add_argument('--models', help='Comma-separated models (default: the one /predict uses).')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    serve.app.config['SPAM_MAX_BATCH'] = max(sizes)
+    messages = pd.read_csv('spam.csv', encoding='latin-1')['v2'].tolist()
+    messages = (messages * (args.messages // len(messages) + 1))[:args.messages]
+    client = serve.app.test_client()
+
+    print(f'{"model":<20} {"endpoint":<15} {"batch":>6} {"messages/s":>11} {"ms/request":>11}')
+    for name in (args.models or serve.default_model()).split(','):
+        # Load the model before timing.
+        client.post('/predict/batch', json={'messages': ['warm up'], 'model': name})
+
+        if name == serve.default_model():
+            count = min(len(messages), 2000)
+            start = time.perf_counter()
+            for message in messages[:count]:
+                client.post('/predict', data={'message': message})
+            elapsed = time.perf_counter() - start
+            print(f'{name:<20} {"/predict":<15} {1:>6} {count / elapsed:>11,.0f} {elapsed / count * 1000:>11.2f}')
+
+        for size in sizes:
+            requests = 0
+            start = time.perf_counter()
+            for i in range(0, len(messages), size):
+                response = client.post('/predict/batch', json={'messages': messages[i:i + size], 'model': name})
+                assert response.status_code == 200, response.json
+                requests += 1
+            elapsed = time.perf_counter() - start
+            print(f'{name:<20} {"/predict/batch":<15} {size:>6} {len(messages) / elapsed:>11,.0f} '
+                  f'{elapsed / requests * 1000:>11.2f}')
+
+if __name__ == '__main__':
+    main()
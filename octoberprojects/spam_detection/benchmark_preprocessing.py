@@ -0,0 +1,54 @@
+"""Compares the old per-message preprocessing with TextPreprocessor on spam.csv.
+
+The old function re-read NLTK's stopword list and rebuilt the punctuation
+table for every message, and ran through ``df['message'].apply``.
+
+    python benchmark_preprocessing.py --repeat 3
+"""
+
+import argparse
+import string
+import time
+import pandas as pd
+from nltk.corpus import stopwords
+from preprocessing import TextPreprocessor, english_stopwords
+from spam_pipeline import make_vectorizer
+
+def old_preprocess_text(text):
+    text = text.lower()
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    stop_words = set(stopwords.words('english'))
+    text = ' '.join([word for word in text.split() if word not in stop_words])
+    return text
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='spam.csv')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    messages = pd.read_csv(args.data, encoding='latin-1')['v2']
+    preprocessor = TextPreprocessor(english_stopwords())
+
+    old_seconds, old = best_of(args.repeat, lambda: messages.apply(old_preprocess_text).tolist())
+    new_seconds, new = best_of(args.repeat, lambda: preprocessor.transform(messages))
+    assert old == new, 'TextPreprocessor output differs from the old function'
+
+    old_fit, _ = best_of(args.repeat, lambda: make_vectorizer().fit_transform(messages.apply(old_preprocess_text)))
+    new_fit, _ = best_of(args.repeat, lambda: make_vectorizer(preprocessor=preprocessor).fit_transform(messages))
+
+    print(f'{len(messages):,} messages, best of {args.repeat}')
+    print(f'{"":<34} {"old s":>8} {"new s":>8} {"speedup":>8}')
+    print(f'{"preprocessing":<34} {old_seconds:>8.3f} {new_seconds:>8.3f} {old_seconds / new_seconds:>7.0f}x')
+    print(f'{"preprocessing + TF-IDF fit":<34} {old_fit:>8.3f} {new_fit:>8.3f} {old_fit / new_fit:>7.0f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Measures how long serve.py takes to start and to answer its first requests.
+
+Each run is a fresh Python process, timing: importing serve (the app is then
+ready to accept requests), the first GET /, the first POST /predict (which
+loads the vectorizer and model) and a second POST /predict. Needs a model
+trained with train.py.
+
+    python benchmark_startup.py --runs 5
+    python benchmark_startup.py --warmup     # with SPAM_WARMUP=1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import serve
+timings = {'import': time.perf_counter() - start}
+client = serve.app.test_client()
+for name, call in [
+    ('first GET /', lambda: client.get('/')),
+    ('first /predict', lambda: client.post('/predict', data={'message': 'Congratulations, you won a prize! Call now.'})),
+    ('second /predict', lambda: client.post('/predict', data={'message': 'See you at lunch tomorrow?'})),
+]:
+    t = time.perf_counter()
+    assert call().status_code == 200
+    timings[name] = time.perf_counter() - t
+print(json.dumps(timings))
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warmup', action='store_true', help='Load the model in the background at startup.')
+    args = parser.parse_args()
+    env = dict(os.environ, SPAM_WARMUP='1' if args.warmup else '0')
+
+    results = []
+    process_seconds = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', CHILD], capture_output=True, text=True, check=True,
+                                   env=env)
+        process_seconds.append(time.perf_counter() - start)
+        results.append(json.loads(completed.stdout.splitlines()[-1]))
+
+    print(f'{"step":<34} {"median ms":>10} {"max ms":>10}')
+    for step in results[0]:
+        values = [r[step] * 1000 for r in results]
+        print(f'{step:<34} {statistics.median(values):>10.1f} {max(values):>10.1f}')
+    values = [seconds * 1000 for seconds in process_seconds]
+    print(f'{"whole process (incl. interpreter)":<34} {statistics.median(values):>10.1f} {max(values):>10.1f}')
+
+if __name__ == '__main__':
+    main()
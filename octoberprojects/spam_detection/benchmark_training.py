@@ -0,0 +1,88 @@
+"""Measures fit time and peak memory of the spam training pipeline at several corpus sizes.
+
+Larger corpora are made by resampling the messages in spam.csv. Each size
+runs in its own process so its peak memory (max RSS) is measured separately.
+
+    python benchmark_training.py --sizes 5000,100000,1000000
+    python benchmark_training.py --sizes 5000 --dense     # the old .toarray() path, for comparison
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from spam_pipeline import MAX_FEATURES, make_vectorizer, make_models, encode_labels
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def load_corpus(size, seed=42):
+    df = pd.read_csv('spam.csv', encoding='latin-1', usecols=['v1', 'v2'])
+    # Lowercasing stands in for TextPreprocessor, so this needs no NLTK data
+    # and times only vectorizing and training.
+    messages = df['v2'].str.lower().to_numpy()
+    index = np.random.default_rng(seed).integers(0, len(df), size)
+    return messages[index], encode_labels(df['v1'].to_numpy()[index])
+
+def run(size, model_names, dense):
+    messages, y = load_corpus(size)
+    result = {'size': size, 'load_mb': round(peak_rss_mb())}
+
+    start = time.perf_counter()
+    tfidf = make_vectorizer()
+    X = tfidf.fit_transform(messages)
+    if dense:
+        X = X.toarray().astype(np.float64)
+    result['vectorize_s'] = round(time.perf_counter() - start, 2)
+    result['matrix_mb'] = round((X.nbytes if dense else X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 2 ** 20, 1)
+    result['dense_mb'] = round(size * MAX_FEATURES * 8 / 2 ** 20)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    models = make_models()
+    for name in model_names:
+        start = time.perf_counter()
+        models[name].fit(X_train, y_train)
+        result[f'{name}_fit_s'] = round(time.perf_counter() - start, 2)
+        result[f'{name}_accuracy'] = round(float(models[name].score(X_test, y_test)), 4)
+    result['peak_mb'] = round(peak_rss_mb())
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='5000,100000,1000000', help='Comma-separated message counts.')
+    parser.add_argument('--models', default='naive_bayes,logistic_regression,random_forest',
+                        help='Comma-separated models to fit (random_forest is slow at 1M messages).')
+    parser.add_argument('--dense', action='store_true', help='Convert to a dense float64 array like the old script.')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    model_names = args.models.split(',')
+
+    if args.child:
+        print(json.dumps(run(args.child, model_names, args.dense)))
+        return
+
+    columns = ['size', 'matrix_mb', 'dense_mb', 'vectorize_s'] + [f'{name}_fit_s' for name in model_names] + ['peak_mb']
+    widths = [max(len(column), 8) for column in columns]
+    print('  '.join(f'{column:>{width}}' for column, width in zip(columns, widths)))
+    for size in (int(s) for s in args.sizes.split(',')):
+        command = [sys.executable, __file__, '--child', str(size), '--models', args.models]
+        if args.dense:
+            command.append('--dense')
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            # Most likely killed for running out of memory.
+            print(f'{size:>{widths[0]}}  failed (exit code {completed.returncode}): {completed.stderr.strip()[-200:]}')
+            continue
+        result = json.loads(completed.stdout.splitlines()[-1])
+        print('  '.join(f'{result.get(column, "-"):>{width}}' for column, width in zip(columns, widths)))
+        print('  ' + ', '.join(f'{name} accuracy {result[f"{name}_accuracy"]}' for name in model_names))
+
+if __name__ == '__main__':
+    main()
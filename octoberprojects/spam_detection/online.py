@@ -0,0 +1,226 @@
+"""Keeps a spam model up to date from a stream of labelled messages.
+
+Messages are vectorized with a HashingVectorizer, which has no vocabulary to
+fit, and learned with partial_fit one mini-batch at a time. The model is
+checkpointed as an artifact version (see artifacts.py) every few batches, so
+serve.py can pick it up and a restarted run can carry on from it.
+
+    python online.py --input spam.csv                       # one pass over files
+    python online.py --watch incoming/ --publish            # follow a directory
+    tail -f feed.jsonl | python online.py --input -         # JSON lines on stdin
+
+Input files are CSV with v1/v2 or label/message columns, or JSON lines with
+"label" and "message" keys. Labels are "spam"/"ham" or 1/0.
+
+With --watch, a file is learned once its size and modification time are
+unchanged between two scans. A writer that can pause for longer than --poll
+should write under a dotfile or .tmp name and rename the file when complete.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from artifacts import METADATA, ModelArtifacts, save_artifacts, new_version, serving_versions
+from preprocessing import TextPreprocessor, english_stopwords
+from train import DEFAULT_MODEL_DIR
+
+N_FEATURES = 2 ** 20
+CLASSES = np.array([0, 1], dtype=np.int8)
+INPUT_EXTENSIONS = ('.csv', '.jsonl', '.ndjson')
+
+def make_online_model(name):
+    # Both support partial_fit and predict_proba, so /predict/batch can serve them.
+    if name == 'online_sgd':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    if name == 'online_naive_bayes':
+        return MultinomialNB(alpha=0.1)
+    raise ValueError(f"Unknown online model {name!r}")
+
+def make_hashing_vectorizer(stop_words, n_features=N_FEATURES):
+    # alternate_sign=False keeps features non-negative, which MultinomialNB needs.
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, dtype=np.float32,
+                             preprocessor=TextPreprocessor(stop_words))
+
+def encode_label(label):
+    return 1 if str(label).strip().lower() in ('spam', '1', 'true') else 0
+
+def read_batches(source, batch_size):
+    """Yields (messages, labels) mini-batches from a file path, or stdin for '-'."""
+    if source == '-' or source.endswith(('.jsonl', '.ndjson')):
+        f = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        try:
+            messages, labels = [], []
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                messages.append(record['message'])
+                labels.append(encode_label(record['label']))
+                if len(messages) >= batch_size:
+                    yield messages, labels
+                    messages, labels = [], []
+            if messages:
+                yield messages, labels
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        return
+    for chunk in pd.read_csv(source, encoding='latin-1', chunksize=batch_size):
+        label_column, message_column = ('v1', 'v2') if 'v1' in chunk.columns else ('label', 'message')
+        chunk = chunk.dropna(subset=[label_column, message_column])
+        yield chunk[message_column].astype(str).tolist(), [encode_label(label) for label in chunk[label_column]]
+
+class OnlineTrainer:
+    """A hashing vectorizer and a partial_fit model, plus counters saved with each checkpoint."""
+
+    def __init__(self, model_name, vectorizer, model=None, state=None):
+        self.model_name = model_name
+        self.vectorizer = vectorizer
+        self.model = model if model is not None else make_online_model(model_name)
+        self.state = state or {'messages_seen': 0, 'batches': 0, 'checkpoints': 0, 'files_done': [],
+                               'recent_accuracy': None}
+
+    @classmethod
+    def resume(cls, root, model_name):
+        """Loads the newest checkpoint of ``model_name`` under ``root``, or returns None."""
+        versions = online_versions(root, model_name)
+        if not versions:
+            return None
+        artifacts = ModelArtifacts(root, versions[-1])
+        return cls(model_name, artifacts.vectorizer, artifacts.model(model_name), artifacts.metadata['online'])
+
+    def partial_fit(self, messages, labels):
+        """Learns one mini-batch and returns the accuracy on it from before the update."""
+        X = self.vectorizer.transform(messages)
+        y = np.asarray(labels, dtype=np.int8)
+        # Test-then-train: scoring each batch before learning it measures how
+        # well the model handles messages it hasn't seen yet.
+        accuracy = float(self.model.score(X, y)) if self.state['batches'] else None
+        self.model.partial_fit(X, y, classes=CLASSES)
+        self.state['messages_seen'] += len(messages)
+        self.state['batches'] += 1
+        if accuracy is not None:
+            previous = self.state['recent_accuracy']
+            self.state['recent_accuracy'] = accuracy if previous is None else 0.9 * previous + 0.1 * accuracy
+        return accuracy
+
+    def checkpoint(self, root, publish=False, keep=5):
+        self.state['checkpoints'] += 1
+        version = f"{new_version()}-{self.model_name}-{self.state['checkpoints']:06d}"
+        save_artifacts(root, self.vectorizer, {self.model_name: self.model}, {
+            'stop_words': sorted(self.vectorizer.preprocessor.stop_words),
+            'preprocessing': 'vectorizer',
+            'vectorizer': 'hashing',
+            'default_model': self.model_name,
+            'online': self.state,
+        }, version=version, make_latest=publish)
+        prune_checkpoints(root, self.model_name, keep)
+        return version
+
+def online_versions(root, model_name):
+    """Returns the checkpoint versions of ``model_name`` under ``root``, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if f'-{model_name}-' in name and os.path.exists(os.path.join(root, name, METADATA)))
+
+def prune_checkpoints(root, model_name, keep):
+    # Never the version in LATEST or one a running serve.py has loaded.
+    served = serving_versions(root)
+    for version in online_versions(root, model_name)[:-keep]:
+        if version not in served:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+def pending_files(directory, done, previous):
+    """Returns the files in ``directory`` that are ready to learn, and the stats to pass next time.
+
+    A file is only ready once its size and modification time are the same as
+    in the ``previous`` scan, so one still being written is left for later.
+    Dotfiles and names not ending in an input extension (e.g. ``.tmp``) are
+    ignored, so a writer can also create a file under such a name and rename
+    it when complete.
+    """
+    stats = {}
+    for name in os.listdir(directory):
+        if name.startswith('.') or not name.endswith(INPUT_EXTENSIONS) or name in done:
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        stats[name] = (stat.st_size, stat.st_mtime_ns)
+    ready = sorted(os.path.join(directory, name) for name, stat in stats.items() if previous.get(name) == stat)
+    return ready, stats
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', nargs='+', help="Files to learn from, or '-' for JSON lines on stdin.")
+    source.add_argument('--watch', help='Directory to follow; new files are learned as they appear.')
+    parser.add_argument('--model', choices=['online_sgd', 'online_naive_bayes'], default='online_sgd')
+    parser.add_argument('--output', default=DEFAULT_MODEL_DIR, help='Artifact directory (default: models/).')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Messages per partial_fit call.')
+    parser.add_argument('--checkpoint-every', type=int, default=20, help='Batches between checkpoints.')
+    parser.add_argument('--keep', type=int, default=5, help='Checkpoints to keep.')
+    parser.add_argument('--poll', type=float, default=5.0, help='Seconds between directory scans with --watch.')
+    parser.add_argument('--publish', action='store_true', help='Make each checkpoint the version serve.py loads.')
+    parser.add_argument('--fresh', action='store_true', help="Start a new model instead of resuming the last checkpoint.")
+    args = parser.parse_args()
+
+    trainer = None if args.fresh else OnlineTrainer.resume(args.output, args.model)
+    if trainer is None:
+        trainer = OnlineTrainer(args.model, make_hashing_vectorizer(english_stopwords()))
+    else:
+        print(f"Resuming after {trainer.state['messages_seen']:,} messages")
+    last_checkpoint = trainer.state['batches']
+
+    def checkpoint():
+        nonlocal last_checkpoint
+        version = trainer.checkpoint(args.output, publish=args.publish, keep=args.keep)
+        last_checkpoint = trainer.state['batches']
+        accuracy = trainer.state['recent_accuracy']
+        print(f"Checkpoint {version}: {trainer.state['messages_seen']:,} messages, "
+              f"recent accuracy {accuracy:.4f}" if accuracy is not None else f"Checkpoint {version}")
+
+    def learn(path):
+        for messages, labels in read_batches(path, args.batch_size):
+            trainer.partial_fit(messages, labels)
+            if trainer.state['batches'] - last_checkpoint >= args.checkpoint_every:
+                checkpoint()
+
+    # Stop on SIGTERM as on Ctrl-C, saving what was learned since the last checkpoint.
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        if args.input:
+            for path in args.input:
+                learn(path)
+        else:
+            stats = {}
+            while True:
+                ready, stats = pending_files(args.watch, set(trainer.state['files_done']), stats)
+                for path in ready:
+                    learn(path)
+                    # A file only counts as done once a checkpoint includes it;
+                    # after a crash, a partly learned file is learned again.
+                    trainer.state['files_done'].append(os.path.basename(path))
+                    checkpoint()
+                time.sleep(args.poll)
+    except KeyboardInterrupt:
+        pass
+    if trainer.state['batches'] != last_checkpoint:
+        checkpoint()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import atexit
+import logging
+import os
+import socket
+import threading
+from flask import Flask, request, render_template, jsonify
+from artifacts import LATEST, ModelArtifacts, latest_version, mark_serving, unmark_serving
+from preprocessing import TextPreprocessor
+
+# Serves the models written by train.py. Importing this module only reads
+# environment variables; the artifacts are loaded by the first request.
+#
+#   SPAM_MODEL_DIR      artifact directory (default: models/ next to this file)
+#   SPAM_MODEL_VERSION  version to serve (default: the one in models/LATEST,
+#                       followed as it changes, e.g. when online.py publishes)
+#   SPAM_MODEL          model used by /predict (default: the version's default
+#                       model, e.g. online_sgd for online.py checkpoints, or
+#                       logistic_regression)
+#   SPAM_MAX_BATCH      most messages accepted by /predict/batch (default: 1000)
+#   SPAM_WARMUP=1       load the vectorizer and model in a background thread
+#                       at startup, so the first request doesn't wait for them
+
+MODEL_DIR = os.environ.get('SPAM_MODEL_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+PINNED_VERSION = os.environ.get('SPAM_MODEL_VERSION')
+
+def server_name():
+    # Per process, so each worker of a forking server has its own marker.
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+class ServedArtifacts:
+    """The artifacts being served, swapped for a new version when LATEST changes.
+
+    Each call to get() stats LATEST. When it has been replaced, the request
+    that notices loads the new version's vectorizer and default model, then
+    swaps it in; other requests keep using the old version meanwhile. The
+    loaded version is recorded with artifacts.mark_serving, so online.py
+    doesn't prune it.
+    """
+
+    def __init__(self, root, pinned_version=None):
+        self.root = root
+        self.pinned_version = pinned_version
+        self.current = ModelArtifacts(root, pinned_version)
+        self._latest_stat = None
+        self._marked = None
+        self._swap_lock = threading.Lock()
+
+    def get(self):
+        if self.pinned_version is None:
+            try:
+                stat = os.stat(os.path.join(self.root, LATEST))
+                stat = (stat.st_ino, stat.st_mtime_ns)
+            except FileNotFoundError:
+                stat = None
+            if stat != self._latest_stat and self._swap_lock.acquire(blocking=False):
+                try:
+                    self._reload(stat)
+                finally:
+                    self._swap_lock.release()
+        if self.current.requested_version not in (None, self._marked):
+            self._mark(self.current.requested_version)
+        return self.current
+
+    def _reload(self, stat):
+        try:
+            version = latest_version(self.root)
+        except FileNotFoundError:
+            # Nothing trained yet; the first use of the artifacts reports it.
+            self._latest_stat = stat
+            return
+        if version == self.current.requested_version:
+            self._latest_stat = stat
+            return
+        # Mark it first, so it can't be pruned while it loads.
+        self._mark(version)
+        candidate = ModelArtifacts(self.root, version)
+        try:
+            candidate.vectorizer
+            candidate.model(default_model(candidate))
+        except Exception:
+            # Tried again once LATEST changes; get() re-marks the version still served.
+            logging.exception(f"Couldn't load model version {version}; still serving the previous one")
+            self._latest_stat = stat
+            return
+        self.current = candidate
+        self._latest_stat = stat
+        logging.info(f"Now serving model version {version}")
+
+    def _mark(self, version):
+        if version is None:
+            return
+        try:
+            mark_serving(self.root, server_name(), version)
+            self._marked = version
+        except OSError as e:
+            logging.warning(f"Couldn't record the served model version: {e}")
+
+served = ServedArtifacts(MODEL_DIR, PINNED_VERSION)
+atexit.register(lambda: unmark_serving(MODEL_DIR, server_name()))
+
+# Flask App
+app = Flask(__name__)
+app.config['SPAM_MODEL'] = os.environ.get('SPAM_MODEL')
+app.config['SPAM_MAX_BATCH'] = int(os.environ.get('SPAM_MAX_BATCH') or 1000)
+
+def default_model(artifacts=None):
+    artifacts = artifacts or served.get()
+    return app.config['SPAM_MODEL'] or artifacts.metadata.get('default_model', 'logistic_regression')
+
+def warm_up():
+    artifacts = served.get()
+    artifacts.vectorizer
+    artifacts.model(default_model(artifacts))
+
+if os.environ.get('SPAM_WARMUP') == '1':
+    threading.Thread(target=warm_up, daemon=True).start()
+
+def vectorize(artifacts, messages):
+    if artifacts.metadata.get('preprocessing') == 'vectorizer':
+        return artifacts.vectorizer.transform(messages)
+    # Versions saved before the vectorizer did its own preprocessing.
+    return artifacts.vectorizer.transform(TextPreprocessor(artifacts.stop_words).transform(messages))
+
+@app.route('/')
+def home():
+    return render_template('index.html')
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    if request.method == 'POST':
+        message = request.form['message']
+        # One version for the whole request, even if a new one is published meanwhile.
+        artifacts = served.get()
+        vectorized_message = vectorize(artifacts, [message])
+
+        prediction = artifacts.model(default_model(artifacts)).predict(vectorized_message)[0]
+        result = "Spam" if prediction == 1 else "Ham"
+
+        return render_template('index.html', prediction_text=f'This email is: {result}')
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Classifies a JSON batch of messages with one vectorizer and one model call.
+
+    Request: ``{"messages": ["...", ...], "model": "naive_bayes"}`` (``model``
+    is optional). Response: the label and spam probability of each message,
+    in order.
+    """
+    payload = request.get_json(silent=True)
+    messages = payload.get('messages') if isinstance(payload, dict) else None
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return jsonify(error='Expected a JSON object with "messages": a list of strings'), 400
+    max_batch = app.config['SPAM_MAX_BATCH']
+    if len(messages) > max_batch:
+        return jsonify(error=f'At most {max_batch} messages per batch, got {len(messages)}'), 413
+    artifacts = served.get()
+    name = payload.get('model') or default_model(artifacts)
+    try:
+        model = artifacts.model(name)
+    except KeyError as e:
+        return jsonify(error=e.args[0]), 400
+
+    if messages:
+        spam_probability = model.predict_proba(vectorize(artifacts, messages))[:, list(model.classes_).index(1)]
+    else:
+        spam_probability = []
+    return jsonify(
+        model=name,
+        version=artifacts.version,
+        labels=['spam' if p > 0.5 else 'ham' for p in spam_probability],
+        spam_probability=[round(float(p), 6) for p in spam_probability],
+    )
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -2,17 +2,15 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
-import nltk
-import string
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split, RandomizedSearchCV
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
-from flask import Flask, request, render_template
+from artifacts import ModelArtifacts, save_artifacts
+from preprocessing import TextPreprocessor, english_stopwords
+from spam_pipeline import MAX_FEATURES, make_vectorizer, make_models, encode_labels, evaluate_models
+from train import DEFAULT_MODEL_DIR
+
+# Exploratory run: trains the models, shows the words that matter most and
+# tunes the random forest. train.py is the non-interactive way to produce
+# models, and serve.py serves them.
 
 # Load the dataset (make sure 'spam.csv' is in the same directory)
 df = pd.read_csv('spam.csv', encoding='latin-1')
@@ -21,40 +19,30 @@ df = pd.read_csv('spam.csv', encoding='latin-1')
 df = df[['v1', 'v2']]
 df.columns = ['label', 'message']
 
-# Download stopwords from NLTK if not already done
-nltk.download('stopwords')
-
-# Text preprocessing function
-def preprocess_text(text):
-    text = text.lower()
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    stop_words = set(stopwords.words('english'))
-    text = ' '.join([word for word in text.split() if word not in stop_words])
-    return text
+# Downloads stopwords from NLTK if not already done
+stop_words = english_stopwords()
+preprocessor = TextPreprocessor(stop_words)
 
-df['cleaned_message'] = df['message'].apply(preprocess_text)
-
-# Initialize the TF-IDF Vectorizer
-tfidf = TfidfVectorizer(max_features=3000)
-X = tfidf.fit_transform(df['cleaned_message']).toarray()
+# Initialize the TF-IDF Vectorizer. X stays a float32 CSR sparse matrix; see spam_pipeline.py.
+# The vectorizer runs the preprocessor itself, so the saved one takes raw messages.
+tfidf = make_vectorizer(preprocessor=preprocessor)
+X = tfidf.fit_transform(df['message'])
 
 # Define the target variable
-y = df['label'].apply(lambda x: 1 if x == 'spam' else 0)
+y = encode_labels(df['label'])
 
-# Split the data
+# Split the data (train_test_split keeps sparse matrices sparse)
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Train Naive Bayes model
-nb_model = MultinomialNB()
-nb_model.fit(X_train, y_train)
-
-# Train Logistic Regression model
-log_reg_model = LogisticRegression(max_iter=1000)
-log_reg_model.fit(X_train, y_train)
+# Train Naive Bayes, Logistic Regression and Random Forest models
+models = make_models()
+for model in models.values():
+    model.fit(X_train, y_train)
+nb_model = models['naive_bayes']
+log_reg_model = models['logistic_regression']
+rf_model = models['random_forest']
 
-# Train Random Forest model
-rf_model = RandomForestClassifier(random_state=42)
-rf_model.fit(X_train, y_train)
+evaluate_models(models, X_test, y_test)
 
 # ---------------------------
 # 1. Feature Importance
@@ -99,49 +87,26 @@ print(f"Best accuracy: {random_search_rf.best_score_:.4f}")
 # 3. Saving and Loading Models
 # ---------------------------
 
-# Save the models and TF-IDF vectorizer
-joblib.dump(log_reg_model, 'logistic_regression_model.pkl')
-joblib.dump(rf_model, 'random_forest_model.pkl')
-joblib.dump(nb_model, 'naive_bayes_model.pkl')
-joblib.dump(tfidf, 'tfidf_vectorizer.pkl')
+# Save the models and TF-IDF vectorizer as a new version for serve.py
+version = save_artifacts(DEFAULT_MODEL_DIR, tfidf, models, {
+    'data': 'spam.csv', 'rows': len(df), 'max_features': MAX_FEATURES, 'stop_words': sorted(stop_words),
+    'preprocessing': 'vectorizer',
+})
 
 # Load the models
-loaded_log_reg_model = joblib.load('logistic_regression_model.pkl')
-loaded_rf_model = joblib.load('random_forest_model.pkl')
-loaded_nb_model = joblib.load('naive_bayes_model.pkl')
-loaded_tfidf = joblib.load('tfidf_vectorizer.pkl')
+loaded = ModelArtifacts(DEFAULT_MODEL_DIR, version)
 
 # Test the loaded models
 test_text = "Congratulations, you've won a free prize! Call now."
-test_text_cleaned = preprocess_text(test_text)
-test_text_vectorized = loaded_tfidf.transform([test_text_cleaned])
+test_text_vectorized = loaded.vectorizer.transform([test_text])
 
-print("\nLoaded Logistic Regression prediction:", loaded_log_reg_model.predict(test_text_vectorized))
-print("Loaded Random Forest prediction:", loaded_rf_model.predict(test_text_vectorized))
-print("Loaded Naive Bayes prediction:", loaded_nb_model.predict(test_text_vectorized))
+print(f"\nSaved and reloaded version {version}")
+print("Loaded Logistic Regression prediction:", loaded.model('logistic_regression').predict(test_text_vectorized))
+print("Loaded Random Forest prediction:", loaded.model('random_forest').predict(test_text_vectorized))
+print("Loaded Naive Bayes prediction:", loaded.model('naive_bayes').predict(test_text_vectorized))
 
 # ---------------------------
 # 4. Deploying the Model as a Web App (Flask)
 # ---------------------------
 
-# Flask App
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return render_template('index.html')
-
-@app.route('/predict', methods=['POST'])
-def predict():
-    if request.method == 'POST':
-        message = request.form['message']
-        cleaned_message = preprocess_text(message)
-        vectorized_message = loaded_tfidf.transform([cleaned_message])
-        
-        prediction = loaded_log_reg_model.predict(vectorized_message)[0]
-        result = "Spam" if prediction == 1 else "Ham"
-        
-        return render_template('index.html', prediction_text=f'This email is: {result}')
-
-if __name__ == "__main__":
-    app.run(debug=True)
+# The web app is in serve.py and only loads saved models: python serve.py
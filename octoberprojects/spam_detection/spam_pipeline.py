@@ -0,0 +1,39 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+
+# Shared pieces of the spam classifier, so the training script and the
+# benchmarks build exactly the same pipeline.
+#
+# Everything stays a scipy CSR sparse matrix from the vectorizer to the
+# models: a TF-IDF row has a few dozen non-zero values out of 3000 features,
+# so a dense array is ~100x bigger and runs out of memory on large corpora.
+
+MAX_FEATURES = 3000
+
+def make_vectorizer(max_features=MAX_FEATURES, preprocessor=None):
+    # float32 halves the size of the matrix; TF-IDF values don't need float64.
+    # Pass a preprocessing.TextPreprocessor to have the vectorizer take raw messages.
+    return TfidfVectorizer(max_features=max_features, dtype=np.float32, preprocessor=preprocessor)
+
+def make_models():
+    # All three accept CSR input. MultinomialNB and RandomForest work in
+    # float32; LogisticRegression's lbfgs solver makes a float64 copy of the
+    # sparse data, which is still small.
+    return {
+        'naive_bayes': MultinomialNB(),
+        'logistic_regression': LogisticRegression(max_iter=1000),
+        'random_forest': RandomForestClassifier(random_state=42),
+    }
+
+def encode_labels(labels):
+    return (np.asarray(labels) == 'spam').astype(np.int8)
+
+def evaluate_models(models, X_test, y_test):
+    for name, model in models.items():
+        predictions = model.predict(X_test)
+        print(f"\n{name}: accuracy {accuracy_score(y_test, predictions):.4f}")
+        print(classification_report(y_test, predictions, target_names=['ham', 'spam'], digits=4))
@@ -0,0 +1,96 @@
+"""Trains the spam classifiers and saves them as a new versioned artifact for serve.py.
+
+    python train.py                                  # spam.csv -> models/<version>/
+    python train.py --data mail.csv --models naive_bayes,logistic_regression
+    python train.py --search                         # also tune the random forest
+"""
+
+import argparse
+import os
+import time
+import pandas as pd
+import sklearn
+from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from sklearn.metrics import accuracy_score
+from artifacts import save_artifacts
+from preprocessing import TextPreprocessor, english_stopwords
+from spam_pipeline import MAX_FEATURES, make_vectorizer, make_models, encode_labels, evaluate_models
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+def load_dataset(path):
+    df = pd.read_csv(path, encoding='latin-1')
+    # Drop unnecessary columns
+    df = df[['v1', 'v2']]
+    df.columns = ['label', 'message']
+    return df
+
+def tune_random_forest(model, X_train, y_train):
+    #Adjust n_estimators if the code is taking too long. Also try using smaller data sets if it becomes an issue.
+    param_grid = {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [10, 20, None]
+    }
+    search = RandomizedSearchCV(model, param_distributions=param_grid, n_iter=5, cv=3, scoring='accuracy',
+                                random_state=42)
+    search.fit(X_train, y_train)
+    print(f"Best parameters for Random Forest: {search.best_params_}")
+    print(f"Best accuracy: {search.best_score_:.4f}")
+    return search.best_estimator_, search.best_params_
+
+def train(df, model_names, stop_words, search=False):
+    """Fits the vectorizer and models; returns them with the metadata to save alongside."""
+    # The vectorizer cleans messages itself, so serve.py can pass them in raw.
+    tfidf = make_vectorizer(preprocessor=TextPreprocessor(stop_words))
+    X = tfidf.fit_transform(df['message'])
+    y = encode_labels(df['label'])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    models = {name: model for name, model in make_models().items() if name in model_names}
+    fit_seconds = {}
+    best_params = None
+    for name, model in models.items():
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        if name == 'random_forest' and search:
+            models[name], best_params = tune_random_forest(model, X_train, y_train)
+        fit_seconds[name] = round(time.perf_counter() - start, 2)
+    evaluate_models(models, X_test, y_test)
+
+    metadata = {
+        'rows': len(df),
+        'max_features': MAX_FEATURES,
+        'sklearn_version': sklearn.__version__,
+        'stop_words': sorted(stop_words),
+        'preprocessing': 'vectorizer',
+        'accuracy': {name: round(float(accuracy_score(y_test, model.predict(X_test))), 4)
+                     for name, model in models.items()},
+        'fit_seconds': fit_seconds,
+    }
+    if best_params is not None:
+        metadata['random_forest_params'] = best_params
+    return tfidf, models, metadata
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='spam.csv', help='Labelled CSV with v1 (ham/spam) and v2 (message) columns.')
+    parser.add_argument('--output', default=DEFAULT_MODEL_DIR, help='Artifact directory (default: models/).')
+    parser.add_argument('--models', default=','.join(make_models()),
+                        help='Comma-separated models to train (default: all).')
+    parser.add_argument('--search', action='store_true', help='Tune the random forest with RandomizedSearchCV.')
+    parser.add_argument('--no-latest', action='store_true', help="Don't make this version the one served.")
+    args = parser.parse_args()
+
+    model_names = args.models.split(',')
+    unknown = set(model_names) - set(make_models())
+    if unknown:
+        parser.error(f"Unknown models: {', '.join(sorted(unknown))}")
+
+    df = load_dataset(args.data)
+    tfidf, models, metadata = train(df, model_names, english_stopwords(), search=args.search)
+    metadata['data'] = os.path.basename(args.data)
+    version = save_artifacts(args.output, tfidf, models, metadata, make_latest=not args.no_latest)
+    print(f"\nSaved version {version} to {os.path.join(args.output, version)}")
+
+if __name__ == '__main__':
+    main()